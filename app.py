@@ -1,42 +1,77 @@
-from flask import Flask, jsonify
+from flask import Flask, Response
 from flask_cors import CORS
+from flask_compress import Compress
+from werkzeug.middleware.proxy_fix import ProxyFix
+import orjson
 import os
-from src.controllers.email_controller import EmailController
-from src.utils.config import Config
+from src.controllers.email_controller import get_controller
+from src.utils.config import get_config
 
 def create_app():
     app = Flask(__name__)
-    config = Config()
+    config = get_config()
+    
+    # Corpos acima do limite são recusados pelo Werkzeug antes de serem lidos
+    app.config['MAX_CONTENT_LENGTH'] = config.MAX_REQUEST_BYTES * config.MAX_BATCH_EMAILS
+    
+    # Só vale a pena comprimir respostas maiores, como as de lote
+    app.config['COMPRESS_MIMETYPES'] = ['application/json']
+    app.config['COMPRESS_ALGORITHM'] = 'gzip'
+    app.config['COMPRESS_LEVEL'] = 4
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    
+    # X-Forwarded-For só é considerado atrás de proxies conhecidos; sem eles vale o remote_addr,
+    # para que o cliente não escolha o próprio IP usado no rate limit
+    if config.TRUSTED_PROXY_COUNT > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=config.TRUSTED_PROXY_COUNT)
     
     CORS(app, origins=["*"])
+    Compress(app)
     
-    email_controller = EmailController()
+    email_controller = get_controller()
+    
+    api_info_json = orjson.dumps({
+        'name': 'Email Classifier API',
+        'version': '1.0.0',
+        'status': 'online',
+        'endpoints': {
+            'classify': 'POST /api/classificar',
+            'classify_batch': 'POST /api/classificar/batch',
+            'health': 'GET /api/health',
+            'health_deep': 'GET /api/health/deep'
+        }
+    })
     
     @app.route('/api/classificar', methods=['POST'])
     def classificar_email():
         return email_controller.classificar_email()
     
+    @app.route('/api/classificar/batch', methods=['POST'])
+    def classificar_lote():
+        return email_controller.classificar_lote()
+    
     @app.route('/api/health', methods=['GET'])
     def health_check():
         return email_controller.health_check()
     
+    @app.route('/api/health/deep', methods=['GET'])
+    def deep_health_check():
+        return email_controller.deep_health_check()
+    
     @app.route('/api')
     def api_info():
-        return {
-            'name': 'Email Classifier API',
-            'version': '1.0.0',
-            'status': 'online',
-            'endpoints': {
-                'classify': 'POST /api/classificar',
-                'health': 'GET /api/health'
-            }
-        }
+        return Response(api_info_json, mimetype='application/json')
+    
+    @app.errorhandler(413)
+    def payload_too_large(error):
+        return email_controller.payload_too_large()
     
     return app
 
 if __name__ == '__main__':
+    # Servidor de desenvolvimento; em produção use: gunicorn -c gunicorn.conf.py
     app = create_app()
-    config = Config()
+    config = get_config()
     
     host = '0.0.0.0'
     port = int(os.environ.get('PORT', 8080))
@@ -0,0 +1,11 @@
+# Ponto de entrada ASGI
+# Uso: uvicorn asgi:app --workers 2 --loop uvloop --http httptools
+#
+# O app Flask continua síncrono: o WSGIMiddleware do a2wsgi executa cada requisição
+# em um pool de threads (WSGI_THREADS), enquanto o uvicorn cuida das conexões no event loop.
+import os
+
+from a2wsgi import WSGIMiddleware
+from app import create_app
+
+app = WSGIMiddleware(create_app(), workers=int(os.environ.get('WSGI_THREADS', '32')))
@@ -0,0 +1,25 @@
+# Configuração do Gunicorn para produção
+# Uso: gunicorn -c gunicorn.conf.py
+#
+# O Gunicorn carrega este arquivo antes de importar a aplicação, então o patch
+# do gevent é aplicado antes de Flask/requests criarem sockets, ssl ou timers.
+# As chamadas à API do Hugging Face precisam continuar usando requests/urllib3
+# (Python puro) para cederem a vez aos outros greenlets durante o I/O.
+from gevent import monkey
+monkey.patch_all()
+
+import multiprocessing
+import os
+
+wsgi_app = "app:create_app()"
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+worker_class = "gevent"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_connections = 1000
+# Mantém conexões de clientes e balanceadores abertas entre requisições
+keepalive = 75
+
+# Carrega o app (e o EmailService) no master antes do fork: os workers
+# compartilham essa memória via copy-on-write em vez de cada um criar a sua
+preload_app = True
@@ -1,116 +1,421 @@
-from flask import jsonify, request
+from flask import Response, request
 from src.services.email_service import EmailService
-from src.models.email_model import EmailRequest
+from src.models.email_model import EmailRequest, EmailResponse, BatchEmailRequest, BatchEmailResponse
+from src.utils.cache import RateLimiter, ResponseCache, gerar_chave_cache
+from src.utils.config import get_config
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from werkzeug.exceptions import RequestEntityTooLarge
 import logging
+import orjson
+import queue
+import threading
+import time
 from datetime import datetime
 
+_ERRO_JSON_INVALIDO = orjson.dumps({
+    'erro': 'Corpo da requisição não é um JSON válido',
+    'codigo': 'INVALID_JSON'
+})
+_ERRO_CORPO_GRANDE = orjson.dumps({
+    'erro': 'Corpo da requisição muito grande',
+    'codigo': 'PAYLOAD_TOO_LARGE'
+})
+_ERRO_CORPO_VAZIO = orjson.dumps({
+    'erro': 'Corpo da requisição vazio',
+    'codigo': 'EMPTY_BODY'
+})
+_ERRO_CAMPO_TEXTO = orjson.dumps({
+    'erro': 'Campo "texto" é obrigatório',
+    'codigo': 'MISSING_TEXT_FIELD'
+})
+_ERRO_TEXTO_VAZIO = orjson.dumps({
+    'erro': 'Texto do email não pode estar vazio',
+    'codigo': 'EMPTY_TEXT'
+})
+
+_ERRO_RATE_LIMIT = orjson.dumps({
+    'erro': 'Limite de requisições excedido, tente novamente em instantes',
+    'codigo': 'RATE_LIMIT_EXCEEDED'
+})
+
+_INICIO_PROCESSO = time.monotonic()
+
+_HEALTH_STATUS = {
+    'status': 'healthy',
+    'service': 'Email Classifier AI API',
+    'version': '1.0.0'
+}
+
+def _json(payload, status: int = 200):
+    return Response(orjson.dumps(payload), mimetype='application/json'), status
+
+def _json_bytes(corpo: bytes, status: int = 200):
+    return Response(corpo, mimetype='application/json'), status
+
+class RequestBatcher:
+    """
+    Agrupa requisições concorrentes que chegam dentro de uma janela curta
+    em uma única chamada de EmailService.batch_processar_email.
+    Cada lote drenado roda em um pool limitado, para que uma rodada lenta da API
+    não segure as requisições que chegam depois.
+    """
+    def __init__(self, email_service: EmailService, max_batch: int = 32, max_wait_ms: int = 20,
+                 max_concorrencia: int = 8):
+        self.email_service = email_service
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_concorrencia = max(1, max_concorrencia)
+        self._fila = queue.Queue()
+        self._worker = None
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def submit(self, email_request: EmailRequest) -> Future:
+        self._garantir_worker()
+        
+        future = Future()
+        self._fila.put((email_request, future))
+        return future
+    
+    def _garantir_worker(self):
+        # Iniciado sob demanda: threads não sobrevivem ao fork dos workers do Gunicorn
+        if self._worker is not None and self._worker.is_alive():
+            return
+        
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concorrencia,
+                                                    thread_name_prefix='RequestBatcher')
+                self._worker = threading.Thread(target=self._loop, name='RequestBatcher', daemon=True)
+                self._worker.start()
+    
+    def _loop(self):
+        while True:
+            itens = [self._fila.get()]
+            limite = time.monotonic() + self.max_wait
+            
+            while len(itens) < self.max_batch:
+                restante = limite - time.monotonic()
+                try:
+                    itens.append(self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            
+            self._executor.submit(self._processar, itens)
+    
+    def _processar(self, itens):
+        # Requisições que desistiram de esperar cancelam o próprio future; não são processadas
+        itens = [item for item in itens if not item[1].cancelled()]
+        if not itens:
+            return
+        
+        try:
+            resultados = self.email_service.batch_processar_email(
+                [email_request for email_request, _ in itens],
+                abandonado=lambda i: itens[i][1].cancelled()
+            )
+        except Exception as e:
+            resultados = [e] * len(itens)
+        
+        for (_, future), resultado in zip(itens, resultados):
+            try:
+                if isinstance(resultado, Exception):
+                    future.set_exception(resultado)
+                elif resultado is not None:
+                    future.set_result(resultado)
+            except InvalidStateError:
+                # Cancelado entre a checagem e a entrega do resultado
+                pass
+
 class EmailController:
     def __init__(self):
+        self.config = get_config()
         self.email_service = EmailService()
+        self.cache = ResponseCache(**self.config.get_cache_config())
+        self.rate_limiter = RateLimiter(
+            limite=self.config.RATE_LIMIT_PER_MINUTE,
+            redis_url=self.config.REDIS_URL,
+            max_connections=self.config.REDIS_MAX_CONNECTIONS
+        ) if self.config.RATE_LIMIT_ENABLED else None
+        self.batcher = RequestBatcher(
+            self.email_service,
+            max_batch=self.config.BATCH_MAX_SIZE,
+            max_wait_ms=self.config.BATCH_MAX_WAIT_MS,
+            max_concorrencia=self.config.BATCH_WORKERS
+        )
         self.logger = self._setup_logger()
+        self._health_teste = None
+        self._health_teste_expira = 0.0
     
     def _setup_logger(self):
         logger = logging.getLogger('EmailController')
         logger.setLevel(logging.INFO)
         return logger
     
+    def _obter_ip_cliente(self) -> str:
+        # Atrás de proxies confiáveis (TRUSTED_PROXY_COUNT) o ProxyFix já reescreve o remote_addr
+        return request.remote_addr or 'desconhecido'
+    
+    def _limite_excedido(self) -> bool:
+        if self.rate_limiter is None:
+            return False
+        
+        ip = self._obter_ip_cliente()
+        if self.rate_limiter.registrar(ip):
+            return False
+        
+        self.logger.warning("🚫 Rate limit excedido para %s", ip)
+        return True
+    
+    def _resposta_rate_limit(self):
+        response = Response(_ERRO_RATE_LIMIT, mimetype='application/json')
+        response.headers['Retry-After'] = str(self.rate_limiter.janela)
+        return response, 429
+    
     def classificar_email(self):
         """
         Endpoint principal para classificação de emails
         """
-        start_time = datetime.now()
+        start_time = time.perf_counter()
+        start_iso = datetime.now().isoformat()
         
         try:
-            self.logger.info(f"📨 Nova requisição de classificação recebida")
+            self.logger.info("📨 Nova requisição de classificação recebida")
+            
+            # Toda requisição conta no limite antes do parse, inclusive as malformadas
+            if self._limite_excedido():
+                return self._resposta_rate_limit()
             
-            if not request.is_json:
-                return jsonify({
-                    'erro': 'Content-Type deve ser application/json',
-                    'codigo': 'INVALID_CONTENT_TYPE'
-                }), 400
+            if (request.content_length or 0) > self.config.MAX_REQUEST_BYTES:
+                return self.payload_too_large()
             
-            data = request.get_json()
+            try:
+                data = orjson.loads(request.get_data(cache=False))
+            except orjson.JSONDecodeError:
+                return _json_bytes(_ERRO_JSON_INVALIDO, 400)
             
             if not data:
-                return jsonify({
-                    'erro': 'Corpo da requisição vazio',
-                    'codigo': 'EMPTY_BODY'
-                }), 400
+                return _json_bytes(_ERRO_CORPO_VAZIO, 400)
             
-            if 'texto' not in data:
-                return jsonify({
-                    'erro': 'Campo "texto" é obrigatório',
-                    'codigo': 'MISSING_TEXT_FIELD'
-                }), 400
+            if not isinstance(data, dict) or not isinstance(data.get('texto'), str):
+                return _json_bytes(_ERRO_CAMPO_TEXTO, 400)
             
             texto = data['texto'].strip()
+            n = len(texto)
             
-            if not texto:
-                return jsonify({
-                    'erro': 'Texto do email não pode estar vazio',
-                    'codigo': 'EMPTY_TEXT'
-                }), 400
+            if not n:
+                return _json_bytes(_ERRO_TEXTO_VAZIO, 400)
             
-            if len(texto) < 10:
-                return jsonify({
+            if n < 10:
+                return _json({
                     'erro': 'Texto do email muito curto (mínimo 10 caracteres)',
                     'codigo': 'TEXT_TOO_SHORT',
-                    'tamanho_atual': len(texto)
-                }), 400
+                    'tamanho_atual': n
+                }, 400)
             
-            if len(texto) > 10000:
-                return jsonify({
+            if n > 10000:
+                return _json({
                     'erro': 'Texto do email muito longo (máximo 10.000 caracteres)',
                     'codigo': 'TEXT_TOO_LONG',
-                    'tamanho_atual': len(texto)
-                }), 400
+                    'tamanho_atual': n
+                }, 400)
+            
+            chave_cache = gerar_chave_cache(texto)
+            resposta_cache = self.cache.obter(chave_cache)
             
-            email_request = EmailRequest(
+            if resposta_cache is not None:
+                self.logger.info("♻️ Resposta servida do cache")
+                return _json_bytes(resposta_cache, 200)
+            
+            email_request = EmailRequest.from_validated(
                 texto=texto,
                 formato=data.get('formato', 'texto'),
                 metadata={
-                    'timestamp': start_time.isoformat(),
-                    'tamanho_texto': len(texto),
+                    'timestamp': start_iso,
+                    'tamanho_texto': n,
                     'user_agent': request.headers.get('User-Agent', 'Desconhecido')
                 }
             )
             
-            self.logger.info(f"🔍 Processando email de {len(texto)} caracteres...")
-            resultado = self.email_service.processar_email(email_request)
+            self.logger.info("🔍 Processando email de %d caracteres...", n)
+            future = self.batcher.submit(email_request)
+            try:
+                resultado = future.result(timeout=self.config.BATCH_TIMEOUT)
+            except FuturesTimeoutError:
+                if not future.cancel():
+                    # O lote terminou no instante do prazo
+                    resultado = future.result()
+                else:
+                    # A rodada da API estourou o prazo: responde com a classificação local em vez de um 500.
+                    # O future cancelado faz o lote descartar este item, que só conta uma vez nas métricas
+                    self.logger.warning("⏱️ Lote não respondeu em %ss, usando classificação local", self.config.BATCH_TIMEOUT)
+                    resultado = self.email_service.processar_email(
+                        email_request,
+                        self.email_service.ai_service.classificar_localmente_aprimorado(texto),
+                        classificacao_local=True
+                    )
+            
+            processing_time = time.perf_counter() - start_time
             
-            processing_time = (datetime.now() - start_time).total_seconds()
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("✅ Email classificado como '%s' com %.1f%% de confiança em %.2fs",
+                                 resultado.categoria.value, resultado.confianca * 100, processing_time)
             
-            self.logger.info(f"✅ Email classificado como '{resultado.categoria}' "
-                           f"com {resultado.confianca*100:.1f}% de confiança "
-                           f"em {processing_time:.2f}s")
+            resultado.tempo_processamento = f"{processing_time:.3f}s"
+            resultado.timestamp = start_iso
             
-            response_data = resultado.to_dict()
-            response_data.update({
-                'tempo_processamento': f"{processing_time:.3f}s",
-                'timestamp': datetime.now().isoformat()
-            })
+            resposta_json = resultado.to_json_bytes()
+            # Resposta do fallback local não fica no cache: a próxima requisição tenta o modelo de novo
+            if not resultado.degradado:
+                self.cache.salvar(chave_cache, resposta_json)
             
-            return jsonify(response_data), 200
+            return _json_bytes(resposta_json, 200)
+            
+        except RequestEntityTooLarge:
+            return self.payload_too_large()
             
         except ValueError as e:
-            self.logger.warning(f"⚠️ Erro de validação: {str(e)}")
-            return jsonify({
+            self.logger.warning("⚠️ Erro de validação: %s", e)
+            return _json({
                 'erro': str(e),
                 'codigo': 'VALIDATION_ERROR'
-            }), 400
+            }, 400)
             
         except Exception as e:
-            self.logger.error(f"❌ Erro interno no servidor: {str(e)}", exc_info=True)
+            self.logger.error("❌ Erro interno no servidor: %s", e, exc_info=True)
             
-            return jsonify({
+            return _json({
                 'erro': 'Erro interno no processamento do email',
                 'codigo': 'INTERNAL_SERVER_ERROR',
                 'detalhes': 'Nossa equipe foi notificada'
-            }), 500
+            }, 500)
+    
+    def classificar_lote(self):
+        """
+        Endpoint para classificação de vários emails em uma única requisição
+        """
+        start_time = time.perf_counter()
+        
+        try:
+            if self._limite_excedido():
+                return self._resposta_rate_limit()
+            
+            try:
+                data = orjson.loads(request.get_data(cache=False))
+            except orjson.JSONDecodeError:
+                return _json_bytes(_ERRO_JSON_INVALIDO, 400)
+            
+            emails = data.get('emails') if isinstance(data, dict) else None
+            
+            if not isinstance(emails, list) or not emails:
+                return _json({
+                    'erro': 'Campo "emails" deve ser uma lista não vazia',
+                    'codigo': 'MISSING_EMAILS_FIELD'
+                }, 400)
+            
+            if len(emails) > self.config.MAX_BATCH_EMAILS:
+                return _json({
+                    'erro': f'Lote muito grande (máximo {self.config.MAX_BATCH_EMAILS} emails)',
+                    'codigo': 'BATCH_TOO_LARGE',
+                    'tamanho_atual': len(emails)
+                }, 400)
+            
+            # Uma entrada por email recebido, na ordem de entrada: EmailResponse ou a exceção da falha
+            resultados = [None] * len(emails)
+            email_requests = {}
+            for indice, item in enumerate(emails):
+                texto = item.get('texto') if isinstance(item, dict) else item
+                formato = item.get('formato', 'texto') if isinstance(item, dict) else 'texto'
+                
+                erro = None
+                if not isinstance(texto, str):
+                    erro = 'Campo "texto" é obrigatório'
+                else:
+                    texto = texto.strip()
+                    n = len(texto)
+                    
+                    if not n:
+                        erro = 'Texto do email não pode estar vazio'
+                    elif n < 10:
+                        erro = 'Texto do email muito curto (mínimo 10 caracteres)'
+                    elif n > 10000:
+                        erro = 'Texto do email muito longo (máximo 10.000 caracteres)'
+                
+                if erro:
+                    resultados[indice] = ValueError(erro)
+                else:
+                    email_requests[indice] = EmailRequest.from_validated(texto=texto, formato=formato)
+            
+            batch_request = BatchEmailRequest(emails=list(email_requests.values()))
+            
+            validos = list(email_requests)
+            chaves_cache = {i: gerar_chave_cache(email_requests[i].texto) for i in validos}
+            respostas_cache = self.cache.obter_varios([chaves_cache[i] for i in validos]) if validos else []
+            
+            for i, resposta in zip(validos, respostas_cache):
+                if resposta is not None:
+                    resultados[i] = EmailResponse.from_cached_dict(orjson.loads(resposta))
+            pendentes = [i for i in validos if resultados[i] is None]
+            
+            self.logger.info("📦 Processando lote %s com %d emails (%d do cache, %d inválidos)...",
+                             batch_request.batch_id, len(emails), len(validos) - len(pendentes),
+                             len(emails) - len(validos))
+            
+            if pendentes:
+                processados = self.email_service.batch_processar_email([email_requests[i] for i in pendentes])
+                novos = {}
+                
+                for i, resultado in zip(pendentes, processados):
+                    resultados[i] = resultado
+                    if not isinstance(resultado, Exception) and not resultado.degradado:
+                        novos[chaves_cache[i]] = resultado.to_json_bytes()
+                
+                if novos:
+                    self.cache.salvar_varios(novos)
+            
+            falhas = sum(isinstance(resultado, Exception) for resultado in resultados)
+            processing_time = time.perf_counter() - start_time
+            
+            batch_response = BatchEmailResponse(
+                resultados=resultados,
+                batch_id=batch_request.batch_id,
+                total_processados=len(resultados),
+                sucessos=len(resultados) - falhas,
+                falhas=falhas,
+                tempo_total_processamento=f"{processing_time:.3f}s"
+            )
+            
+            return _json(batch_response.to_dict(), 200)
+            
+        except RequestEntityTooLarge:
+            return self.payload_too_large()
+            
+        except Exception as e:
+            self.logger.error("❌ Erro interno no processamento do lote: %s", e, exc_info=True)
+            
+            return _json({
+                'erro': 'Erro interno no processamento do lote',
+                'codigo': 'INTERNAL_SERVER_ERROR',
+                'detalhes': 'Nossa equipe foi notificada'
+            }, 500)
+    
+    def payload_too_large(self):
+        return _json_bytes(_ERRO_CORPO_GRANDE, 413)
     
     def health_check(self):
         """
-        Endpoint de health check para monitoramento
+        Endpoint de health check leve para probes de liveness/readiness.
+        Não aciona o modelo; use deep_health_check para validar a classificação.
+        """
+        return _json({
+            **_HEALTH_STATUS,
+            'timestamp': datetime.now().isoformat(),
+            'uptime_s': round(time.monotonic() - _INICIO_PROCESSO, 3)
+        }, 200)
+    
+    def deep_health_check(self):
+        """
+        Endpoint de health check completo, executando uma classificação de teste
         """
         try:
             health_status = {
@@ -124,22 +429,15 @@ class EmailController:
                 }
             }
             
-            test_text = "Teste de saúde do sistema"
-            test_request = EmailRequest(texto=test_text, formato="texto")
-            
-            test_result = self.email_service.processar_email(test_request)
             health_status['dependencies']['classification'] = 'operational'
-            health_status['last_test'] = {
-                'categoria': test_result.categoria,
-                'confianca': test_result.confianca
-            }
+            health_status['last_test'] = self._executar_teste_saude()
             
-            return jsonify(health_status), 200
+            return _json(health_status, 200)
             
         except Exception as e:
-            self.logger.error(f"🚨 Health check falhou: {str(e)}")
+            self.logger.error("🚨 Health check falhou: %s", e)
             
-            return jsonify({
+            return _json({
                 'status': 'unhealthy',
                 'service': 'Email Classifier AI API',
                 'version': '1.0.0',
@@ -149,7 +447,28 @@ class EmailController:
                     'email_service': 'failed',
                     'ai_service': 'failed'
                 }
-            }), 503
+            }, 503)
+    
+    def _executar_teste_saude(self):
+        """
+        Executa a classificação de teste no máximo uma vez por HEALTH_CHECK_TTL,
+        evitando que pings de monitoramento acionem o modelo a cada chamada
+        """
+        agora = time.monotonic()
+        
+        if self._health_teste is None or agora >= self._health_teste_expira:
+            test_text = "Teste de saúde do sistema"
+            test_request = EmailRequest(texto=test_text, formato="texto")
+            
+            # Fora do cache de resultados, para o teste de fato passar pelo modelo a cada HEALTH_CHECK_TTL
+            test_result = self.email_service.processar_email(test_request, usar_cache=False)
+            self._health_teste = {
+                'categoria': test_result.categoria.value,
+                'confianca': test_result.confianca
+            }
+            self._health_teste_expira = agora + self.config.HEALTH_CHECK_TTL
+        
+        return self._health_teste
     
     def get_stats(self):
         """
@@ -163,8 +482,17 @@ class EmailController:
                 'versao_api': '1.0.0'
             }
             
-            return jsonify(stats), 200
+            return _json(stats, 200)
             
         except Exception as e:
-            self.logger.error(f"Erro ao obter estatísticas: {str(e)}")
-            return jsonify({'erro': 'Não foi possível obter estatísticas'}), 500
\ No newline at end of file
+            self.logger.error("Erro ao obter estatísticas: %s", e)
+            return _json({'erro': 'Não foi possível obter estatísticas'}, 500)
+
+_CONTROLLER_SINGLETON = None
+
+def get_controller() -> EmailController:
+    """Devolve o EmailController do processo, criando-o no primeiro uso"""
+    global _CONTROLLER_SINGLETON
+    if _CONTROLLER_SINGLETON is None:
+        _CONTROLLER_SINGLETON = EmailController()
+    return _CONTROLLER_SINGLETON
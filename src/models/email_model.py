@@ -1,8 +1,16 @@
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Union
 from enum import Enum
 from datetime import datetime
-import uuid
+import itertools
+import os
+import orjson
+
+_contador_ids = itertools.count(1)
+
+def _proximo_id() -> str:
+    # pid + contador monotônico: único por processo e mais barato que uuid4
+    return f"{os.getpid():x}_{next(_contador_ids):x}"
 
 class CategoriaEmail(Enum):
     PRODUTIVO = "Produtivo"
@@ -10,13 +18,14 @@ class CategoriaEmail(Enum):
     
     @classmethod
     def from_string(cls, value: str):
-        value_lower = value.lower().strip()
-        for member in cls:
-            if member.value.lower() == value_lower:
-                return member
-        raise ValueError(f"Categoria inválida: {value}")
+        member = _CATEGORIAS_POR_NOME.get(value.lower().strip())
+        if member is None:
+            raise ValueError(f"Categoria inválida: {value}")
+        return member
+
+_CATEGORIAS_POR_NOME = {member.value.lower(): member for member in CategoriaEmail}
 
-@dataclass
+@dataclass(slots=True)
 class EmailRequest:
     texto: str
     formato: Optional[str] = "texto"
@@ -33,12 +42,23 @@ class EmailRequest:
         self.texto = self.texto.strip()
         
         if not self.request_id:
-            self.request_id = f"req_{uuid.uuid4().hex[:8]}"
+            self.request_id = f"req_{_proximo_id()}"
         
         if self.metadata is None:
             self.metadata = {}
+    
+    @classmethod
+    def from_validated(cls, texto: str, formato: Optional[str] = "texto",
+                       metadata: Optional[Dict[str, Any]] = None) -> 'EmailRequest':
+        """Cria a requisição a partir de texto já validado e sem espaços nas bordas"""
+        obj = cls.__new__(cls)
+        obj.texto = texto
+        obj.formato = formato
+        obj.metadata = metadata if metadata is not None else {}
+        obj.request_id = f"req_{_proximo_id()}"
+        return obj
 
-@dataclass
+@dataclass(slots=True)
 class EmailResponse:
     categoria: CategoriaEmail
     resposta_sugerida: str
@@ -48,6 +68,8 @@ class EmailResponse:
     tempo_processamento: Optional[str] = None
     request_id: Optional[str] = None
     timestamp: Optional[str] = None
+    # Classificação do fallback local: não vai para os caches (nem para a resposta JSON)
+    degradado: bool = False
     
     def __post_init__(self):
         if not self.timestamp:
@@ -56,6 +78,21 @@ class EmailResponse:
         if not 0 <= self.confianca <= 1:
             raise ValueError(f"Confiança deve estar entre 0 e 1, recebido: {self.confianca}")
     
+    @classmethod
+    def from_cached_dict(cls, dados: Dict[str, Any]) -> 'EmailResponse':
+        """Reconstrói uma resposta previamente serializada por to_dict, sem revalidar"""
+        obj = cls.__new__(cls)
+        obj.categoria = CategoriaEmail(dados['categoria'])
+        obj.resposta_sugerida = dados['resposta_sugerida']
+        obj.texto_processado = dados['texto_processado']
+        obj.confianca = dados['confianca']
+        obj.modelo_utilizado = dados.get('modelo_utilizado')
+        obj.tempo_processamento = dados.get('tempo_processamento')
+        obj.request_id = dados.get('request_id')
+        obj.timestamp = dados.get('timestamp')
+        obj.degradado = False
+        return obj
+    
     def to_dict(self) -> Dict[str, Any]:
         return {
             'categoria': self.categoria.value,
@@ -69,6 +106,9 @@ class EmailResponse:
             'nivel_confianca': self._get_nivel_confianca()
         }
     
+    def to_json_bytes(self) -> bytes:
+        return orjson.dumps(self.to_dict())
+    
     def _get_nivel_confianca(self) -> str:
         """Retorna nível textual da confiança"""
         if self.confianca >= 0.9:
@@ -90,25 +130,43 @@ class EmailResponse:
             'resposta_sugerida': self.resposta_sugerida[:100] + '...' if len(self.resposta_sugerida) > 100 else self.resposta_sugerida
         }
 
-@dataclass
+@dataclass(slots=True)
 class BatchEmailRequest:
     emails: list[EmailRequest]
     batch_id: Optional[str] = None
     
     def __post_init__(self):
         if not self.batch_id:
-            self.batch_id = f"batch_{uuid.uuid4().hex[:8]}"
+            self.batch_id = f"batch_{_proximo_id()}"
     
     def to_dict(self) -> Dict[str, Any]:
         return {
             'batch_id': self.batch_id,
             'total_emails': len(self.emails),
-            'emails': [asdict(email) for email in self.emails]
+            'emails': [
+                {
+                    'texto': email.texto,
+                    'formato': email.formato,
+                    'metadata': email.metadata,
+                    'request_id': email.request_id
+                }
+                for email in self.emails
+            ]
         }
 
-@dataclass
+def _item_lote(indice: int, resultado: Union[EmailResponse, Exception]) -> Dict[str, Any]:
+    if not isinstance(resultado, Exception):
+        return {'indice': indice, **resultado.to_dict()}
+    
+    # Erros de validação são do cliente e podem ser repassados; os demais não expõem detalhes internos
+    if isinstance(resultado, ValueError):
+        return {'indice': indice, 'erro': str(resultado), 'codigo': 'VALIDATION_ERROR'}
+    return {'indice': indice, 'erro': 'Erro interno no processamento do email', 'codigo': 'PROCESSING_ERROR'}
+
+@dataclass(slots=True)
 class BatchEmailResponse:
-    resultados: list[EmailResponse]
+    # Um item por email do lote, na ordem de entrada; falhas vêm como a exceção correspondente
+    resultados: list[Union[EmailResponse, Exception]]
     batch_id: str
     total_processados: int
     sucessos: int
@@ -121,12 +179,14 @@ class BatchEmailResponse:
             'total_processados': self.total_processados,
             'sucessos': self.sucessos,
             'falhas': self.falhas,
-            'taxa_sucesso': round(self.sucessos / self.total_processados, 3) if self.total_processados > 0 else 0,
+            'taxa_sucesso': round(self.sucessos / max(self.total_processados, 1), 3),
             'tempo_total_processamento': self.tempo_total_processamento,
-            'resultados': [resultado.to_dict() for resultado in self.resultados]
+            'resultados': [
+                _item_lote(indice, resultado) for indice, resultado in enumerate(self.resultados)
+            ]
         }
 
-@dataclass 
+@dataclass(slots=True)
 class ErrorResponse:
     erro: str
     codigo: str
@@ -1,103 +1,564 @@
+import functools
+import itertools
+import logging
 import os
 import requests
 import re
+import threading
 import time
+import weakref
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import nltk
+import orjson
 import random
-from typing import Tuple, List, Dict, Optional
+from typing import Any, Tuple, List, Dict, Optional
 from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer
-from nltk.tokenize import word_tokenize
-from src.utils.config import Config
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.utils.config import get_config
+from src.utils.keyword_matcher import KeywordMatcher
+
+try:
+    # RE2 casa em tempo linear (DFA), sem o backtracking do módulo re
+    import re2 as motor_regex
+except ImportError:
+    motor_regex = re
+
+
+logger = logging.getLogger('AIService')
+
+HF_INFERENCE_URL = "https://api-inference.huggingface.co"
+
+# Parâmetros fixos da classificação zero-shot, já serializados: cada requisição só serializa os textos
+_HF_PARAMETROS_CLASSIFICACAO = orjson.dumps({
+    "candidate_labels": ["produtivo", "improdutivo"],
+    "multi_label": False
+})
+
+PADROES_SOCIAIS_FORTES = (
+    'parabenizar', 'parabéns', 'excelente', 'maravilhoso', 'perfeito',
+    'feliz natal', 'ano novo', 'boas festas', 'agradeço pelo', 'obrigado pelo',
+    'gostaria de parabenizar', 'quero parabenizar', 'muito obrigado', 'muito obrigada'
+)
+
+PADROES_URGENTES = (
+    'urgente', 'crítico', 'emergência', 'fora do ar', 'não funciona',
+    'erro 500', 'erro 503', 'sistema parou', 'prioridade', 'imediato'
+)
+
+PALAVRAS_PRODUTIVAS = {
+    'erro 500': 3.0, 'erro 503': 3.0, 'não funciona': 2.8, 'fora do ar': 2.8,
+    'bug': 2.5, 'falha': 2.5, 'quebrado': 2.5, 'parou': 2.5,
+    
+    'preciso de ajuda': 2.5, 'necessito de ajuda': 2.5, 'problema': 2.0,
+    'não consigo': 2.0, 'como configurar': 1.8, 'dúvida': 1.5,
+    'solicitação': 1.8, 'requisição': 1.8, 'chamado': 1.5,
+    
+    'configurar': 1.2, 'instalar': 1.2, 'integrar': 1.2, 'atualizar': 1.0
+}
+
+PALAVRAS_IMPRODUTIVAS = {
+    'obrigado': 2.5, 'obrigada': 2.5, 'agradeço': 2.5, 'agradecimento': 2.0,
+    'muito obrigado': 3.0, 'muito obrigada': 3.0,
+    
+    'parabéns': 3.0, 'parabenizar': 3.0, 'excelente': 2.5, 'maravilhoso': 2.5,
+    'perfeito': 2.5, 'incrível': 2.0, 'fantástico': 2.0, 'ótimo': 2.0,
+    
+    'feliz natal': 3.0, 'ano novo': 2.8, 'boas festas': 2.5,
+    'cumprimentos': 1.5, 'saudações': 1.5, 'saudação': 1.2,
+    
+    'gostei': 2.0, 'satisfeito': 2.0, 'content': 1.8, 'feliz': 1.5
+}
+
+CONTEXTOS_AGRADECIMENTO = (
+    'obrigado', 'agradeço', 'parabéns', 'gostaria de agradecer',
+    'quero agradecer', 'excelente', 'maravilhoso', 'muito obrigado'
+)
+
+
+def _compilar_contexto_agradecimento(palavra: str) -> re.Pattern:
+    """
+    Regex que encontra `palavra` como token com um contexto de agradecimento até
+    3 tokens antes ou depois dela, a mesma janela que era montada com split/join
+    """
+    alternativas = []
+    palavra_re = re.escape(palavra)
+    
+    for contexto in CONTEXTOS_AGRADECIMENTO:
+        tokens = contexto.split()
+        folga = 3 - len(tokens)
+        contexto_re = r'\s+'.join(map(re.escape, tokens))
+        alternativas.append(rf'{contexto_re}\S*(?:\s+\S+){{0,{folga}}}\s+{palavra_re}(?!\S)')
+        alternativas.append(rf'(?<!\S){palavra_re}\s+(?:\S+\s+){{0,{folga}}}\S*{contexto_re}')
+    
+    return re.compile('|'.join(alternativas))
+
+
+# A análise local só considera o início do email: as decisões se baseiam na presença
+# de palavras-chave, que saturam bem antes disso
+MAX_CLASSIFY_CHARS = 4000
+
+# A varredura de palavras-chave para quando um lado já abriu essa vantagem
+MARGEM_DECISIVA = 5.0
+MIN_PALAVRAS_DECISAO = 3
+
+PALAVRAS_POSITIVAS = ('obrigado', 'parabéns', 'excelente', 'maravilhoso', 'perfeito')
+
+PADROES_PRODUTIVOS = {
+    r'erro\s+\d{3}': 3.0, r'n[aã]o\s+funciona': 2.8, r'fora\s+do\s+ar': 2.8,
+    r'bug': 2.5, r'falha': 2.5, r'quebrado': 2.5, r'parou': 2.5,
+    r'travando': 2.0, r'lento': 1.8, r'problema': 2.0,
+    
+    r'preciso\s+de': 2.0, r'necessito\s+de': 2.0, r'como\s+faço': 1.8,
+    r'como\s+configurar': 1.8, r'd[uú]vida': 1.5, r'ajuda': 1.5,
+    r'solicita[cç][aã]o': 1.8, r'requisi[cç][aã]o': 1.8
+}
+
+PADROES_IMPRODUTIVOS = {
+    r'muito\s+obrigad[ao]': 3.0, r'agradeço\s+pelo': 2.8,
+    r'obrigad[ao]\s+pelo': 2.5, r'agradecimento': 2.0,
+    
+    r'parab[ée]ns': 3.0, r'excelente': 2.5, r'maravilhoso': 2.5,
+    r'perfeito': 2.5, r'incr[ií]vel': 2.0, r'fant[aá]stico': 2.0,
+    
+    r'feliz\s+natal': 3.0, r'ano\s+novo': 2.8, r'boas\s+festas': 2.5,
+    r'felicidades': 1.5, r'sa[uú]de\s+e\s+paz': 1.5
+}
+
+PADROES_SOCIAIS_RAPIDOS = (
+    r'feliz\s+natal', r'ano\s+novo', r'boas\s+festas', 
+    r'parab[ée]ns\s+pelo', r'agradeço\s+pelo', r'muito\s+obrigad[ao]',
+    r'desejo.*feliz', r'felicidades'
+)
+
+PADROES_URGENTES_RAPIDOS = (
+    r'urgente', r'cr[ií]tico', r'emerg[êe]ncia', r'fora\s+do\s+ar',
+    r'n[aã]o\s+funciona', r'erro\s+\d+', r'sistema\s+parou',
+    r'prioridade', r'imediato', r'bloqueado'
+)
+
+_REGEX_CLASSE = re.compile(r'\[([^\]]+)\]')
+# Remove os acentos do texto minúsculo e dos literais: 'crítico' e 'critico' viram uma só chave no matcher
+_TABELA_ACENTOS = str.maketrans('áàâãäéèêëíìîïóòôõöúùûüç', 'aaaaaeeeeiiiiooooouuuuc')
+_REGEX_NAO_LITERAL = re.compile(r'[\\.*+?(){}|^$]')
+_REGEX_PREFIXO_LITERAL = re.compile(r'[^\\.*+?(){}|^$\[]*')
+# Quantificadores que tornam opcional o caractere anterior
+_QUANTIFICADORES_OPCIONAIS = frozenset('?*{')
+
+
+def _tem_alternativa_no_topo(padrao: str) -> bool:
+    """Se o padrão tem um '|' fora de grupos e classes, isto é, se ele todo é uma alternativa"""
+    profundidade = 0
+    em_classe = escapado = False
+    for caractere in padrao:
+        if escapado:
+            escapado = False
+        elif caractere == '\\':
+            escapado = True
+        elif em_classe:
+            em_classe = caractere != ']'
+        elif caractere == '[':
+            em_classe = True
+        elif caractere == '(':
+            profundidade += 1
+        elif caractere == ')':
+            profundidade -= 1
+        elif caractere == '|' and profundidade == 0:
+            return True
+    return False
+
+
+def _prefixo_literal(padrao: str) -> str:
+    """
+    Trecho literal inicial presente em todo texto que a regex encontra ('' quando não há garantia).
+    Um quantificador opcional logo depois do trecho descarta seu último caractere ('erros?' -> 'erro'),
+    e uma alternativa no topo ('a|b') anula o prefixo.
+    """
+    if _tem_alternativa_no_topo(padrao):
+        return ''
+    
+    prefixo = _REGEX_PREFIXO_LITERAL.match(padrao).group()
+    if padrao[len(prefixo):len(prefixo) + 1] in _QUANTIFICADORES_OPCIONAIS:
+        prefixo = prefixo[:-1]
+    return prefixo
+
+
+def _expandir_literais(padrao: str) -> List[str]:
+    """Expande um padrão feito só de texto, classes [ab] e \\s+ em todas as suas variantes literais"""
+    partes = _REGEX_CLASSE.split(padrao.replace(r'\s+', ' '))
+    opcoes = [(parte,) if i % 2 == 0 else tuple(parte) for i, parte in enumerate(partes)]
+    return [''.join(variante) for variante in itertools.product(*opcoes)]
+
+
+def _separar_padroes(padroes: Dict[str, Any]) -> Tuple[Dict[str, Tuple[str, Any]], Tuple[Tuple[Any, Any, str], ...]]:
+    """
+    Divide os padrões em literais, buscados todos de uma vez por um KeywordMatcher sobre o
+    texto com espaços normalizados, e regexes de verdade, compiladas aqui como (regex, valor, prefixo)
+    com o RE2 quando disponível. O prefixo literal da regex ('erro', 'desejo') é testado com `in`
+    antes da busca, e a regex só roda nos textos que o contêm.
+    Cada variante literal, já sem acentos, leva o padrão de origem, para que ele conte uma única vez.
+    """
+    literais = {}
+    regexes = []
+    
+    for padrao, valor in padroes.items():
+        if _REGEX_NAO_LITERAL.search(_REGEX_CLASSE.sub('', padrao.replace(r'\s+', ' '))):
+            # O texto chega sem acentos, então a regex e seu prefixo também precisam chegar
+            padrao_sem_acentos = padrao.translate(_TABELA_ACENTOS)
+            prefixo = _prefixo_literal(padrao_sem_acentos)
+            regexes.append((motor_regex.compile(padrao_sem_acentos), valor, prefixo))
+        else:
+            for variante in _expandir_literais(padrao):
+                literais[variante.translate(_TABELA_ACENTOS)] = (padrao, valor)
+    
+    return literais, tuple(regexes)
+
+
+_LITERAIS_PRODUTIVOS, _REGEXES_PRODUTIVOS = _separar_padroes(PADROES_PRODUTIVOS)
+_LITERAIS_IMPRODUTIVOS, _REGEXES_IMPRODUTIVOS = _separar_padroes(PADROES_IMPRODUTIVOS)
+_LITERAIS_SOCIAIS_RAPIDOS, _REGEXES_SOCIAIS_RAPIDOS = _separar_padroes(dict.fromkeys(PADROES_SOCIAIS_RAPIDOS))
+_LITERAIS_URGENTES_RAPIDOS, _REGEXES_URGENTES_RAPIDOS = _separar_padroes(dict.fromkeys(PADROES_URGENTES_RAPIDOS))
+_LITERAIS_REFORCO, _REGEXES_REFORCO = _separar_padroes(dict.fromkeys(('por favor', 'urgente', 'prioridade')))
+
+# Grupo de cada conjunto de padrões e suas regexes restantes, na ordem em que a varredura os acumula
+_GRUPOS_CLASSIFICACAO = {
+    'produtivo': _REGEXES_PRODUTIVOS,
+    'improdutivo': _REGEXES_IMPRODUTIVOS,
+    'social_forte': _REGEXES_SOCIAIS_RAPIDOS,
+    'urgente': _REGEXES_URGENTES_RAPIDOS,
+    'reforco': _REGEXES_REFORCO
+}
+
+
+def _combinar_literais(**grupos: Dict[str, Tuple[str, Any]]) -> Dict[str, Tuple[Tuple[str, str, Any], ...]]:
+    """Junta os literais de vários grupos em um só dicionário: cada variante leva todos os (grupo, padrão, valor) em que aparece"""
+    combinados = {}
+    for grupo, literais in grupos.items():
+        for variante, (padrao, valor) in literais.items():
+            combinados[variante] = combinados.get(variante, ()) + ((grupo, padrao, valor),)
+    return combinados
+
+
+_LITERAIS_CLASSIFICACAO = _combinar_literais(
+    produtivo=_LITERAIS_PRODUTIVOS,
+    improdutivo=_LITERAIS_IMPRODUTIVOS,
+    social_forte=_LITERAIS_SOCIAIS_RAPIDOS,
+    urgente=_LITERAIS_URGENTES_RAPIDOS,
+    reforco=_LITERAIS_REFORCO
+)
+
+# Só palavras de um token podem coincidir com um token do texto
+_REGEX_CONTEXTO_AGRADECIMENTO = {
+    palavra: _compilar_contexto_agradecimento(palavra)
+    for palavra in PALAVRAS_PRODUTIVAS
+    if ' ' not in palavra
+}
+
+_REGEX_PONTUACAO = re.compile(r'[^\w\s]')
+_REGEX_ESPACOS = re.compile(r'\s+')
+_REGEX_TOKEN = re.compile(r"[\wáàâãéèêíïóôõöúçñ]+")
+# Sufixos flexionais do português; exige ao menos dois caracteres de radical
+_REGEX_SUFIXO = re.compile(r'(?<=\w\w)(?:ar|er|ir|mente|ção|ões|ados|idos|ando|endo|indo)$')
+
+
+def _radicalizar(texto: str) -> str:
+    """Tokeniza e reduz cada token ao radical, sem remover stopwords"""
+    return ' '.join(_REGEX_SUFIXO.sub('', token) for token in _REGEX_TOKEN.findall(texto.lower()))
+
+
+RESPOSTAS_PRODUTIVO_ERRO = (
+    "Agradecemos o reporte do problema. Nossa equipe técnica já está analisando o caso e retornará em breve.",
+    "Identificamos o problema relatado. Um ticket de prioridade foi criado e você receberá atualizações em até 2 horas.",
+    "Obrigado por reportar esta falha. Nossos desenvolvedores estão trabalhando na correção.",
+    "Confirmamos o recebimento do seu reporte de problema. Estamos investigando e retornaremos com uma solução."
+)
+
+RESPOSTAS_PRODUTIVO_DUVIDA = (
+    "Agradecemos sua dúvida. Nossa equipe de suporte responderá com as orientações necessárias em breve.",
+    "Obrigado pela pergunta. Estamos preparando uma resposta detalhada para auxiliá-lo.",
+    "Recebemos sua consulta. Nossa equipe especializada retornará com as informações solicitadas.",
+    "Agradecemos seu questionamento. Em até 1 hora útil você receberá nossa resposta completa."
+)
+
+RESPOSTAS_PRODUTIVO_GERAL = (
+    "Agradecemos seu contato. Nossa equipe analisará sua solicitação e retornará em breve.",
+    "Recebemos sua requisição. Um ticket foi criado e você receberá atualizações em breve.",
+    "Confirmamos o recebimento de sua solicitação. Retornaremos dentro de 24 horas úteis.",
+    "Sua solicitação foi registrada em nosso sistema. Em breve entraremos em contato."
+)
+
+RESPOSTAS_IMPRODUTIVO_FESTAS = (
+    "Agradecemos suas felicitações! Desejamos um feliz natal e um próspero ano novo para você e toda sua equipe!",
+    "Muito obrigado pelas mensagens de festas! Retribuímos os votos de um excelente natal e ano novo!",
+    "Agradecemos seus cumprimentos! Que as festas sejam repletas de alegria e que o novo ano traga ainda mais sucesso!",
+    "Obrigado pelas felicitações! Desejamos a você e sua equipe um natal abençoado e um ano novo cheio de conquistas!"
+)
+
+RESPOSTAS_IMPRODUTIVO_ELOGIO = (
+    "Agradecemos muito pelos elogios! Ficamos felizes em saber que nosso trabalho está atendendo suas expectativas.",
+    "Muito obrigado pelo reconhecimento! Sua satisfação é nossa maior motivação para continuar evoluindo.",
+    "Agradecemos suas palavras! É um prazer poder contribuir com o sucesso do seu negócio.",
+    "Obrigado pelo feedback positivo! Estamos sempre buscando oferecer o melhor serviço possível."
+)
+
+RESPOSTAS_IMPRODUTIVO_GERAL = (
+    "Agradecemos sua mensagem! Desejamos um ótimo dia.",
+    "Obrigado pelo contato! Ficamos felizes com sua mensagem.",
+    "Agradecemos suas palavras! Estamos sempre à disposição.",
+    "Muito obrigado! Sua mensagem foi recebida com alegria."
+)
+
+RESPOSTAS_INTELIGENTES_PRODUTIVO = (
+    "✅ **Solicitação recebida** - Confirmamos o recebimento de sua requisição. Ticket #{} criado com sucesso.",
+    "📋 **Em análise** - Sua solicitação está sendo processada por nossa equipe. Retornaremos em até 2 horas úteis.",
+    "👨‍💻 **Em atendimento** - Já iniciamos a análise do seu caso. Você receberá atualizações em breve."
+)
+
+RESPOSTAS_INTELIGENTES_IMPRODUTIVO = (
+    "💌 **Mensagem recebida** - Agradecemos seu contato! Desejamos um excelente dia.",
+    "🙏 **Agradecemos** - Sua mensagem foi recebida com alegria. Estamos sempre à disposição!",
+    "😊 **Obrigado!** - Valorizamos muito sua interação conosco. Tenha um ótimo dia!"
+)
+
+
+def _alternativa(*literais: str) -> re.Pattern:
+    """Uma única regex que encontra qualquer um dos literais"""
+    return re.compile('|'.join(map(re.escape, literais)))
+
+
+_GATILHOS_AVANCADA = {
+    'erro': _alternativa('erro', 'bug', 'falha'),
+    'duvida': _alternativa('dúvida', 'como fazer'),
+    'festas': _alternativa('natal', 'ano novo'),
+    'elogio': _alternativa('parabéns', 'elogio')
+}
+
+_GATILHOS_LOCAL = {
+    'erro': _alternativa('erro', 'bug', 'não funciona'),
+    'duvida': _alternativa('dúvida', 'como', 'configurar'),
+    'festas': _alternativa('natal', 'ano novo', 'festas'),
+    'elogio': _alternativa('parabéns', 'elogio')
+}
+
+_GATILHOS_INTELIGENTE = {
+    'erro': _alternativa('erro', 'bug', 'não funciona', 'fora do ar'),
+    'duvida': _alternativa('dúvida', 'como fazer', 'configurar'),
+    'urgente': _alternativa('urgente', 'prioridade', 'crítico'),
+    'festas': _alternativa('natal', 'ano novo', 'festas'),
+    'elogio': _alternativa('parabéns', 'elogio', 'excelente')
+}
+
+
+# Os recursos do NLTK só precisam ser localizados/baixados uma vez por processo
+_NLTK_READY = False
+
+_servicos_ativos = weakref.WeakSet()
+
+def _reiniciar_sessoes_apos_fork():
+    # Os sockets do pool foram abertos no processo pai (preload_app do Gunicorn)
+    # e não podem ser compartilhados entre workers
+    for servico in list(_servicos_ativos):
+        servico._session = servico._criar_sessao()
+        servico._executor_hf = servico._criar_executor_hf()
+        servico._aquecer_conexao()
+
+os.register_at_fork(after_in_child=_reiniciar_sessoes_apos_fork)
+
 
 class AIService:
+    # Carregada uma vez por processo e compartilhada entre as instâncias
+    _STOP_WORDS_PT: Optional[frozenset] = None
+
     def __init__(self):
-        self.config = Config()
+        self.config = get_config()
         self.headers = {
             "Authorization": f"Bearer {self.config.HF_API_KEY}",
             "Content-Type": "application/json"
         }
-        self.classification_history = []
-        self._setup_nltk()
-        
-        self.stop_words_pt = set(stopwords.words('portuguese'))
-        self.stemmer = PorterStemmer()
-        
+        self.classification_history = deque(maxlen=100)
         self.priority_models = [
             "facebook/bart-large-mnli",  
             "joeddav/xlm-roberta-large-xnli",  
             "typeform/distilbert-base-uncased-mnli"  
         ]
         
+        self._session = self._criar_sessao()
+        self._executor_hf = self._criar_executor_hf()
+        self._aquecer_conexao()
+        _servicos_ativos.add(self)
+        self._setup_nltk()
+        
+        if AIService._STOP_WORDS_PT is None:
+            AIService._STOP_WORDS_PT = frozenset(stopwords.words('portuguese'))
+        self.stop_words_pt = AIService._STOP_WORDS_PT
+        
         self.generation_model = "microsoft/DialoGPT-medium"  
         
+        self._ac_social = KeywordMatcher(dict.fromkeys(PADROES_SOCIAIS_FORTES))
+        self._ac_urgente = KeywordMatcher(dict.fromkeys(PADROES_URGENTES))
+        # As palavras-chave são buscadas no texto já pré-processado, então passam pelo mesmo radicalizador
+        self._ac_palavras = KeywordMatcher({
+            **{_radicalizar(palavra): ('produtivo', palavra, peso) for palavra, peso in PALAVRAS_PRODUTIVAS.items()},
+            **{_radicalizar(palavra): ('improdutivo', palavra, peso) for palavra, peso in PALAVRAS_IMPRODUTIVAS.items()}
+        })
+        self._ac_ajuste = KeywordMatcher(dict.fromkeys(PALAVRAS_POSITIVAS + ('suporte', 'problema')))
+        
+        self._ac_classificacao = KeywordMatcher(_LITERAIS_CLASSIFICACAO)
+        
+        # Memoiza por instância: o mesmo email costuma ser pré-processado e classificado
+        # mais de uma vez (classificação + estimativa de confiança da resposta)
+        self.preprocessar_texto_avancado = functools.lru_cache(maxsize=512)(self.preprocessar_texto_avancado)
+        self.classificar_localmente_aprimorado = functools.lru_cache(maxsize=512)(self.classificar_localmente_aprimorado)
+        
         print("🚀 AIService inicializado com modelos avançados")
 
+    def _criar_sessao(self) -> requests.Session:
+        """Sessão HTTP com backoff exponencial (com jitter) para erros transitórios da API"""
+        retry = Retry(
+            total=self.config.HF_MAX_RETRIES,
+            backoff_factor=self.config.HF_BACKOFF_FACTOR,
+            backoff_jitter=self.config.HF_BACKOFF_FACTOR,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['POST'],
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        
+        # Cada lote em andamento no RequestBatcher dispara uma requisição por modelo em paralelo; o pool
+        # comporta todas, para nenhuma conexão ser descartada e reaberta com novo handshake TLS
+        pool_maxsize = max(8, self.config.BATCH_WORKERS * len(self.priority_models))
+        
+        sessao = requests.Session()
+        sessao.headers.update(self.headers)
+        sessao.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry))
+        return sessao
+    
+    def _criar_executor_hf(self) -> ThreadPoolExecutor:
+        # Compartilhado por todas as chamadas ao HF, com o mesmo teto de conexões da sessão
+        return ThreadPoolExecutor(max_workers=max(8, self.config.BATCH_WORKERS * len(self.priority_models)),
+                                  thread_name_prefix='hf')
+
+    def _aquecer_conexao(self):
+        """Abre a conexão TLS com a API em segundo plano, para a primeira classificação não pagar o handshake"""
+        if not self.config.ENABLE_HUGGINGFACE:
+            return
+        
+        sessao = self._session
+        
+        def aquecer():
+            try:
+                sessao.head(HF_INFERENCE_URL, timeout=self._timeout)
+            except Exception:
+                pass
+        
+        threading.Thread(target=aquecer, name='hf-warmup', daemon=True).start()
+
+    @property
+    def _timeout(self) -> Tuple[float, float]:
+        return (self.config.HF_CONNECT_TIMEOUT, self.config.REQUEST_TIMEOUT)
+
     def _setup_nltk(self):
+        global _NLTK_READY
+        if _NLTK_READY:
+            return
+        
         try:
-            nltk.data.find('tokenizers/punkt')
             nltk.data.find('corpora/stopwords')
+            _NLTK_READY = True
             print("✅ NLTK pré-configurado")
         except LookupError:
             print("📥 Baixando recursos NLTK...")
             try:
-                nltk.download('punkt', quiet=True)
                 nltk.download('stopwords', quiet=True)
+                _NLTK_READY = True
                 print("✅ Recursos NLTK baixados")
             except Exception as e:
                 print(f"⚠️  Fallback para NLTK básico: {e}")
 
     def classificar_com_huggingface(self, texto: str) -> Tuple[str, float]:
-        modelos = [
-            "facebook/bart-large-mnli",
-            "joeddav/xlm-roberta-large-xnli", 
-            "typeform/distilbert-base-uncased-mnli"
-        ]
+        return self.classificar_emails_em_lote([texto])[0]
+
+    def classificar_emails_em_lote(self, textos: List[str]) -> List[Tuple[str, float]]:
+        """
+        Classifica vários textos em uma única requisição por modelo.
+        Os modelos entram em ordem de prioridade: o próximo só é acionado quando o anterior falha
+        ou não responde em HF_HEDGE_DELAY segundos, e a primeira resposta válida vence.
+        Um modelo carregando (503) não atrasa os demais, e o tráfego não triplica quando o
+        primeiro responde a tempo
+        """
+        prazo = time.monotonic() + self.config.HF_TASK_BUDGET
+        modelos = iter(self.priority_models)
+        pendentes = {}
         
-        for modelo in modelos:
-            try:
-                API_URL = f"https://api-inference.huggingface.co/models/{modelo}"
-                
-                payload = {
-                    "inputs": texto[:400],
-                    "parameters": {
-                        "candidate_labels": ["produtivo", "improdutivo"],
-                        "multi_label": False
-                    }
-                }
-                
-                print(f"🤖 Tentando modelo: {modelo}")
-                response = requests.post(API_URL, headers=self.headers, json=payload, timeout=25)
+        def acionar_proximo_modelo():
+            modelo = next(modelos, None)
+            if modelo is not None:
+                pendentes[self._executor_hf.submit(self._call_hf_model, modelo, textos)] = modelo
+        
+        acionar_proximo_modelo()
+        try:
+            while pendentes:
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    print(f"⏱️ Tempo limite de {self.config.HF_TASK_BUDGET:.0f}s esgotado - encerrando tentativas")
+                    break
                 
-                if response.status_code == 503:
-                    print(f"⏳ Modelo {modelo} carregando...")
-                    time.sleep(12)
-                    response = requests.post(API_URL, headers=self.headers, json=payload, timeout=25)
+                concluidos, _ = wait(pendentes, timeout=min(restante, self.config.HF_HEDGE_DELAY),
+                                     return_when=FIRST_COMPLETED)
                 
-                response.raise_for_status()
-                result = response.json()
+                for future in concluidos:
+                    modelo = pendentes.pop(future)
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        print(f"❌ {modelo} falhou: {e}")
                 
-                if 'labels' in result and 'scores' in result:
-                    best_idx = result['scores'].index(max(result['scores']))
-                    categoria = result['labels'][best_idx]
-                    confianca = result['scores'][best_idx]
-                    
-                    categoria_final = "Produtivo" if categoria == "produtivo" else "Improdutivo"
-                    print(f"✅ {modelo}: {categoria_final} ({confianca:.3f})")
-                    
-                    if "distilbert" in modelo:
-                        confianca = confianca * 0.95 
-                    
-                    return categoria_final, round(confianca, 3)
-                    
-            except Exception as e:
-                print(f"❌ {modelo} falhou: {e}")
-                continue
+                # Falhou ou está demorando: o próximo modelo entra na disputa
+                acionar_proximo_modelo()
+        finally:
+            for future in pendentes:
+                future.cancel()
         
         raise Exception("Todos os modelos Hugging Face falharam")
 
+    def _call_hf_model(self, modelo: str, textos: List[str]) -> List[Tuple[str, float]]:
+        API_URL = f"{HF_INFERENCE_URL}/models/{modelo}"
+        
+        corpo = b''.join((
+            b'{"inputs":', orjson.dumps([texto[:400] for texto in textos]),
+            b',"parameters":', _HF_PARAMETROS_CLASSIFICACAO, b'}'
+        ))
+        
+        print(f"🤖 Tentando modelo: {modelo} ({len(textos)} textos)")
+        response = self._session.post(API_URL, data=corpo, timeout=self._timeout)
+        response.raise_for_status()
+        result = response.json()
+        
+        if isinstance(result, dict):
+            result = [result]
+        
+        if len(result) != len(textos) or any('labels' not in r or 'scores' not in r for r in result):
+            raise Exception("Resposta sem labels/scores para todos os textos")
+        
+        classificacoes = []
+        for r in result:
+            best_idx = r['scores'].index(max(r['scores']))
+            categoria = r['labels'][best_idx]
+            confianca = r['scores'][best_idx]
+            
+            categoria_final = "Produtivo" if categoria == "produtivo" else "Improdutivo"
+            
+            if "distilbert" in modelo:
+                confianca = confianca * 0.95 
+            
+            classificacoes.append((categoria_final, round(confianca, 3)))
+        
+        print(f"✅ {modelo}: {len(classificacoes)} textos classificados")
+        return classificacoes
+
     def classificar_localmente(self, texto: str) -> Tuple[str, float]:
-        print("🔄 Iniciando análise local avançada...")
+        logger.debug("🔄 Iniciando análise local avançada...")
         
         texto_lower = texto.lower()
         texto_limpo = self.preprocessar_texto_avancado(texto)
@@ -127,103 +588,57 @@ class AIService:
             categoria = "Improdutivo" 
             confianca_final = max(0.55, min(0.98, confianca))
         
-        print(f"🎯 Análise Final: {categoria} (P:{total_produtivo:.2f}, I:{total_improdutivo:.2f}, Conf:{confianca_final:.3f})")
+        logger.debug("🎯 Análise Final: %s (P:%.2f, I:%.2f, Conf:%.3f)", categoria, total_produtivo, total_improdutivo, confianca_final)
         
         return categoria, round(confianca_final, 3)
 
     def _analisar_contexto_geral(self, texto_lower: str) -> str:
-        padroes_sociais_fortes = [
-            'parabenizar', 'parabéns', 'excelente', 'maravilhoso', 'perfeito',
-            'feliz natal', 'ano novo', 'boas festas', 'agradeço pelo', 'obrigado pelo',
-            'gostaria de parabenizar', 'quero parabenizar', 'muito obrigado', 'muito obrigada'
-        ]
+        padrao = self._ac_social.primeiro(texto_lower)
+        if padrao is not None:
+            logger.debug("🎉 Contexto social forte detectado: '%s'", padrao)
+            return "social_forte"
         
-        for padrao in padroes_sociais_fortes:
-            if padrao in texto_lower:
-                print(f"🎉 Contexto social forte detectado: '{padrao}'")
-                return "social_forte"
-        
-        padroes_urgentes = [
-            'urgente', 'crítico', 'emergência', 'fora do ar', 'não funciona',
-            'erro 500', 'erro 503', 'sistema parou', 'prioridade', 'imediato'
-        ]
-        
-        for padrao in padroes_urgentes:
-            if padrao in texto_lower:
-                print(f"🚨 Contexto urgente detectado: '{padrao}'")
-                return "urgente"
+        padrao = self._ac_urgente.primeiro(texto_lower)
+        if padrao is not None:
+            logger.debug("🚨 Contexto urgente detectado: '%s'", padrao)
+            return "urgente"
         
         return "neutro"
 
     def _classificar_contexto_social(self, texto_limpo: str, texto_lower: str) -> Tuple[str, float]:
-        print("💬 Analisando contexto social...")
+        logger.debug("💬 Analisando contexto social...")
         
         palavras_solicitacao = ['preciso', 'necessito', 'ajuda', 'problema', 'erro', 'bug', 'falha']
         tem_solicitacao = any(palavra in texto_limpo for palavra in palavras_solicitacao)
         
         if tem_solicitacao:
-            print("⚠️  Contexto social com solicitação detectado")
+            logger.debug("⚠️  Contexto social com solicitação detectado")
             return "Improdutivo", 0.7
         else:
-            print("🎊 Contexto social puro detectado")
+            logger.debug("🎊 Contexto social puro detectado")
             return "Improdutivo", 0.9
 
     def _analise_palavras_chave_contextual(self, texto_limpo: str, texto_lower: str) -> Tuple[float, float]:
-        palavras_produtivas = {
-            'erro 500': 3.0, 'erro 503': 3.0, 'não funciona': 2.8, 'fora do ar': 2.8,
-            'bug': 2.5, 'falha': 2.5, 'quebrado': 2.5, 'parou': 2.5,
-            
-            'preciso de ajuda': 2.5, 'necessito de ajuda': 2.5, 'problema': 2.0,
-            'não consigo': 2.0, 'como configurar': 1.8, 'dúvida': 1.5,
-            'solicitação': 1.8, 'requisição': 1.8, 'chamado': 1.5,
-            
-            'configurar': 1.2, 'instalar': 1.2, 'integrar': 1.2, 'atualizar': 1.0
-        }
-        
-        palavras_improdutivas = {
-            'obrigado': 2.5, 'obrigada': 2.5, 'agradeço': 2.5, 'agradecimento': 2.0,
-            'muito obrigado': 3.0, 'muito obrigada': 3.0,
-            
-            'parabéns': 3.0, 'parabenizar': 3.0, 'excelente': 2.5, 'maravilhoso': 2.5,
-            'perfeito': 2.5, 'incrível': 2.0, 'fantástico': 2.0, 'ótimo': 2.0,
-            
-            'feliz natal': 3.0, 'ano novo': 2.8, 'boas festas': 2.5,
-            'cumprimentos': 1.5, 'saudações': 1.5, 'saudação': 1.2,
-            
-            'gostei': 2.0, 'satisfeito': 2.0, 'content': 1.8, 'feliz': 1.5
-        }
-        
         score_produtivo = 0
         score_improdutivo = 0
         
-        for palavra, peso in palavras_produtivas.items():
-            if palavra in texto_limpo:
-                if not self._esta_em_contexto_agradecimento(palavra, texto_lower):
-                    score_produtivo += peso
-                    print(f"🔴 Produtivo: '{palavra}' (+{peso})")
-        
-        for palavra, peso in palavras_improdutivas.items():
-            if palavra in texto_limpo:
+        for encontradas, (_, (categoria, palavra, peso)) in enumerate(self._ac_palavras.encontrar(texto_limpo), 1):
+            if categoria == 'improdutivo':
                 score_improdutivo += peso
-                print(f"🟢 Improdutivo: '{palavra}' (+{peso})")
+            elif not self._esta_em_contexto_agradecimento(palavra, texto_lower):
+                score_produtivo += peso
+            
+            if encontradas >= MIN_PALAVRAS_DECISAO and abs(score_produtivo - score_improdutivo) >= MARGEM_DECISIVA:
+                break
     
         return score_produtivo, score_improdutivo
 
     def _esta_em_contexto_agradecimento(self, palavra: str, texto_lower: str) -> bool:
-        contextos_agradecimento = [
-            'obrigado', 'agradeço', 'parabéns', 'gostaria de agradecer',
-            'quero agradecer', 'excelente', 'maravilhoso', 'muito obrigado'
-        ]
+        regex = _REGEX_CONTEXTO_AGRADECIMENTO.get(palavra)
         
-        palavras_vizinhas = texto_lower.split()
-        if palavra in palavras_vizinhas:
-            idx = palavras_vizinhas.index(palavra)
-            contexto_proximo = ' '.join(palavras_vizinhas[max(0, idx-3):min(len(palavras_vizinhas), idx+4)])
-            
-            for contexto in contextos_agradecimento:
-                if contexto in contexto_proximo and contexto != palavra:
-                    print(f"🔄 Palavra '{palavra}' em contexto de agradecimento - peso reduzido")
-                    return True
+        if regex is not None and regex.search(texto_lower):
+            logger.debug("🔄 Palavra '%s' em contexto de agradecimento - peso reduzido", palavra)
+            return True
     
         return False
 
@@ -235,43 +650,44 @@ class AIService:
         
         if any(pergunta in texto_lower for pergunta in ['?', 'como', 'por que', 'porque', 'quando']):
             padroes_produtivo += 1.5
-            print("❓ Padrão de pergunta detectado")
+            logger.debug("❓ Padrão de pergunta detectado")
         
         if any(imperativo in texto_lower for imperativo in ['preciso', 'necessito', 'urgente', 'por favor']):
             padroes_produtivo += 1.2
-            print("🎯 Padrão de solicitação detectado")
+            logger.debug("🎯 Padrão de solicitação detectado")
         
         if any(tecnico in texto_lower for tecnico in ['código', 'log', 'erro', 'exceção', 'configuração']):
             padroes_produtivo += 1.3
-            print("💻 Padrão técnico detectado")
+            logger.debug("💻 Padrão técnico detectado")
         
         if any(saudacao in texto_lower for saudacao in ['olá', 'oi ', 'bom dia', 'boa tarde', 'boa noite']):
             padroes_improdutivo += 0.5
         
-        if len(re.findall(r'!', texto)) > 2: 
+        if texto.count('!') > 2: 
             padroes_improdutivo += 0.8
-            print("❗ Muitas exclamações - padrão social")
+            logger.debug("❗ Muitas exclamações - padrão social")
         
         if any(elogio in texto_lower for elogio in ['excelente', 'maravilhoso', 'perfeito', 'incrível']):
             padroes_improdutivo += 1.0
-            print("⭐ Padrão de elogio detectado")
+            logger.debug("⭐ Padrão de elogio detectado")
         
         return padroes_produtivo, padroes_improdutivo
 
     def _ajuste_final_contextual(self, texto_lower: str, score_p: float, score_i: float) -> Tuple[float, float]:
-        if 'obrigado' in texto_lower and 'suporte' in texto_lower:
-            print("🔄 Padrão: Agradecimento por suporte - favorecendo improdutivo")
+        presentes = self._ac_ajuste.presentes(texto_lower)
+        
+        if 'obrigado' in presentes and 'suporte' in presentes:
+            logger.debug("🔄 Padrão: Agradecimento por suporte - favorecendo improdutivo")
             score_i += 2.0
         
-        if any(elogio in texto_lower for elogio in ['parabéns', 'excelente']) and 'problema' in texto_lower:
-            print("🔄 Padrão: Elogio sobre problema resolvido - favorecendo improdutivo")
+        if ('parabéns' in presentes or 'excelente' in presentes) and 'problema' in presentes:
+            logger.debug("🔄 Padrão: Elogio sobre problema resolvido - favorecendo improdutivo")
             score_i += 1.5
         
-        palavras_positivas = ['obrigado', 'parabéns', 'excelente', 'maravilhoso', 'perfeito']
-        count_positivas = sum(1 for palavra in palavras_positivas if palavra in texto_lower)
+        count_positivas = sum(1 for palavra in PALAVRAS_POSITIVAS if palavra in presentes)
         
         if count_positivas >= 2:
-            print(f"🔄 Múltiplas palavras positivas ({count_positivas}) - favorecendo improdutivo")
+            logger.debug("🔄 Múltiplas palavras positivas (%d) - favorecendo improdutivo", count_positivas)
             score_i += 1.0
         
         return score_p, score_i
@@ -302,34 +718,23 @@ class AIService:
         if not texto:
             return ""
         
-        print("🔧 Aplicando pré-processamento NLP...")
+        logger.debug("🔧 Aplicando pré-processamento NLP...")
         
-        texto = texto.lower()
+        tokens = _REGEX_TOKEN.findall(texto.lower())
         
-        texto = re.sub(r'[^\w\sáàâãéèêíïóôõöúçñ]', ' ', texto)
-        
-        try:
-            tokens = word_tokenize(texto, language='portuguese')
-        except:
-            tokens = texto.split()
-        
-        tokens = [token for token in tokens if token not in self.stop_words_pt]
-        
-        tokens = [self.stemmer.stem(token) for token in tokens]
+        tokens = [_REGEX_SUFIXO.sub('', token) for token in tokens if token not in self.stop_words_pt]
         
         texto_processado = ' '.join(tokens)
         
-        texto_processado = re.sub(r'\s+', ' ', texto_processado).strip()
-        
-        print(f"🔧 Texto processado ({len(tokens)} tokens): {texto_processado[:100]}...")
+        logger.debug("🔧 Texto processado (%d tokens): %.100s...", len(tokens), texto_processado)
         return texto_processado
 
     def preprocessar_texto(self, texto: str) -> str:
         if not texto:
             return ""
         
-        texto_limpo = re.sub(r'[^\w\s]', ' ', texto.lower())
-        texto_limpo = re.sub(r'\s+', ' ', texto_limpo).strip()
+        texto_limpo = _REGEX_PONTUACAO.sub(' ', texto.lower())
+        texto_limpo = _REGEX_ESPACOS.sub(' ', texto_limpo).strip()
         
         return texto_limpo
 
@@ -356,20 +761,21 @@ class AIService:
     def extrair_texto_pdf(self, arquivo_path: str) -> str:
         try:
             try:
-                import PyPDF2
+                from pypdf import PdfReader
             except ImportError:
-                print("⚠️  PyPDF2 não instalado. Instale com: pip install PyPDF2")
-                return "[ERRO: Biblioteca PyPDF2 não instalada. Use: pip install PyPDF2]"
+                print("⚠️  pypdf não instalado. Instale com: pip install pypdf")
+                return "[ERRO: Biblioteca pypdf não instalada. Use: pip install pypdf]"
             
-            texto = ""
+            partes = []
             with open(arquivo_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                num_paginas = len(reader.pages)
+                reader = PdfReader(file)
                 
                 for i, pagina in enumerate(reader.pages):
                     texto_pagina = pagina.extract_text()
                     if texto_pagina:
-                        texto += f"--- Página {i+1} ---\n{texto_pagina}\n\n"
+                        partes.append(f"--- Página {i+1} ---\n{texto_pagina}\n\n")
+            
+            texto = ''.join(partes)
             
             if not texto.strip():
                 return "[AVISO: Nenhum texto extraído do PDF. O arquivo pode ser digitalizado.]"
@@ -381,7 +787,7 @@ class AIService:
             return f"[ERRO ao processar PDF: {str(e)}]"
 
     def gerar_resposta_com_ai(self, categoria: str, texto_original: str) -> str:
-        API_URL = "https://api-inference.huggingface.co/models/google/flan-t5-base"
+        API_URL = f"{HF_INFERENCE_URL}/models/google/flan-t5-base"
         
         if categoria == "Produtivo":
             prompt = f"""
@@ -423,12 +829,7 @@ class AIService:
         
         try:
             print("🤖 Chamando Hugging Face API para geração de resposta...")
-            response = requests.post(API_URL, headers=self.headers, json=payload, timeout=30)
-            
-            if response.status_code == 503:
-                time.sleep(8)
-                response = requests.post(API_URL, headers=self.headers, json=payload, timeout=30)
-            
+            response = self._session.post(API_URL, json=payload, timeout=self._timeout)
             response.raise_for_status()
             
             result = response.json()
@@ -475,9 +876,9 @@ class AIService:
         
         if categoria == "Produtivo":
             if confianca > 0.85:
-                if any(word in texto_lower for word in ['erro', 'bug', 'falha']):
+                if _GATILHOS_AVANCADA['erro'].search(texto_lower):
                     return "🔧 Identificamos o problema técnico relatado. Nossa equipe priorizou a análise e retornará com a solução em até 1 hora útil."
-                elif any(word in texto_lower for word in ['dúvida', 'como fazer']):
+                elif _GATILHOS_AVANCADA['duvida'].search(texto_lower):
                     return "💡 Agradecemos sua consulta. Nossa equipe especializada está preparando uma resposta detalhada para orientá-lo no processo."
                 else:
                     return "✅ Recebemos sua solicitação. Um ticket foi criado com prioridade e você receberá atualizações em breve."
@@ -486,9 +887,9 @@ class AIService:
         
         else:  
             if confianca > 0.85:
-                if any(word in texto_lower for word in ['natal', 'ano novo']):
+                if _GATILHOS_AVANCADA['festas'].search(texto_lower):
                     return "🎄 Agradecemos as felicitações! Retribuímos os votos de um feliz natal e um próspero ano novo para você e toda equipe!"
-                elif any(word in texto_lower for word in ['parabéns', 'elogio']):
+                elif _GATILHOS_AVANCADA['elogio'].search(texto_lower):
                     return "⭐ Muito obrigado pelo reconhecimento! Ficamos felizes em saber que nosso trabalho está fazendo a diferença."
                 else:
                     return "🙏 Agradecemos sua mensagem! Valorizamos muito o contato e desejamos um excelente dia."
@@ -501,51 +902,21 @@ class AIService:
         texto_lower = texto_original.lower()
         
         if categoria == "Produtivo":
-            if any(word in texto_lower for word in ['erro', 'bug', 'não funciona']):
-                respostas = [
-                    "Agradecemos o reporte do problema. Nossa equipe técnica já está analisando o caso e retornará em breve.",
-                    "Identificamos o problema relatado. Um ticket de prioridade foi criado e você receberá atualizações em até 2 horas.",
-                    "Obrigado por reportar esta falha. Nossos desenvolvedores estão trabalhando na correção.",
-                    "Confirmamos o recebimento do seu reporte de problema. Estamos investigando e retornaremos com uma solução."
-                ]
-            elif any(word in texto_lower for word in ['dúvida', 'como', 'configurar']):
-                respostas = [
-                    "Agradecemos sua dúvida. Nossa equipe de suporte responderá com as orientações necessárias em breve.",
-                    "Obrigado pela pergunta. Estamos preparando uma resposta detalhada para auxiliá-lo.",
-                    "Recebemos sua consulta. Nossa equipe especializada retornará com as informações solicitadas.",
-                    "Agradecemos seu questionamento. Em até 1 hora útil você receberá nossa resposta completa."
-                ]
+            if _GATILHOS_LOCAL['erro'].search(texto_lower):
+                respostas = RESPOSTAS_PRODUTIVO_ERRO
+            elif _GATILHOS_LOCAL['duvida'].search(texto_lower):
+                respostas = RESPOSTAS_PRODUTIVO_DUVIDA
             else:
-                respostas = [
-                    "Agradecemos seu contato. Nossa equipe analisará sua solicitação e retornará em breve.",
-                    "Recebemos sua requisição. Um ticket foi criado e você receberá atualizações em breve.",
-                    "Confirmamos o recebimento de sua solicitação. Retornaremos dentro de 24 horas úteis.",
-                    "Sua solicitação foi registrada em nosso sistema. Em breve entraremos em contato."
-                ]
+                respostas = RESPOSTAS_PRODUTIVO_GERAL
         else:
-            if any(word in texto_lower for word in ['natal', 'ano novo', 'festas']):
-                respostas = [
-                    "Agradecemos suas felicitações! Desejamos um feliz natal e um próspero ano novo para você e toda sua equipe!",
-                    "Muito obrigado pelas mensagens de festas! Retribuímos os votos de um excelente natal e ano novo!",
-                    "Agradecemos seus cumprimentos! Que as festas sejam repletas de alegria e que o novo ano traga ainda mais sucesso!",
-                    "Obrigado pelas felicitações! Desejamos a você e sua equipe um natal abençoado e um ano novo cheio de conquistas!"
-                ]
-            elif any(word in texto_lower for word in ['parabéns', 'elogio']):
-                respostas = [
-                    "Agradecemos muito pelos elogios! Ficamos felizes em saber que nosso trabalho está atendendo suas expectativas.",
-                    "Muito obrigado pelo reconhecimento! Sua satisfação é nossa maior motivação para continuar evoluindo.",
-                    "Agradecemos suas palavras! É um prazer poder contribuir com o sucesso do seu negócio.",
-                    "Obrigado pelo feedback positivo! Estamos sempre buscando oferecer o melhor serviço possível."
-                ]
+            if _GATILHOS_LOCAL['festas'].search(texto_lower):
+                respostas = RESPOSTAS_IMPRODUTIVO_FESTAS
+            elif _GATILHOS_LOCAL['elogio'].search(texto_lower):
+                respostas = RESPOSTAS_IMPRODUTIVO_ELOGIO
             else:
-                respostas = [
-                    "Agradecemos sua mensagem! Desejamos um ótimo dia.",
-                    "Obrigado pelo contato! Ficamos felizes com sua mensagem.",
-                    "Agradecemos suas palavras! Estamos sempre à disposição.",
-                    "Muito obrigado! Sua mensagem foi recebida com alegria."
-                ]
-        
-        index = hash(texto_original) % len(respostas)
+                respostas = RESPOSTAS_IMPRODUTIVO_GERAL
+        
+        index = hash(texto_original[:32]) % len(respostas)
         return respostas[index]
     
     def gerar_resposta_inteligente(self, categoria: str, texto_original: str, confianca: float) -> str:
@@ -561,55 +932,78 @@ class AIService:
     
     def _gerar_resposta_produtiva(self, texto_lower: str, confianca: float) -> str:
         if confianca > 0.8:
-            if any(word in texto_lower for word in ['erro', 'bug', 'não funciona', 'fora do ar']):
+            if _GATILHOS_INTELIGENTE['erro'].search(texto_lower):
                 return "🔧 **Problema identificado** - Nossa equipe técnica já está analisando esta falha. Você receberá uma atualização em até 1 hora útil."
             
-            elif any(word in texto_lower for word in ['dúvida', 'como fazer', 'configurar']):
+            elif _GATILHOS_INTELIGENTE['duvida'].search(texto_lower):
                 return "💡 **Consulta recebida** - Nossa equipe especializada está preparando um guia detalhado para sua dúvida. Retornaremos em breve."
             
-            elif any(word in texto_lower for word in ['urgente', 'prioridade', 'crítico']):
+            elif _GATILHOS_INTELIGENTE['urgente'].search(texto_lower):
                 return "🚨 **Caso prioritário** - Sua solicitação foi marcada como urgente. Atualizações em até 30 minutos."
         
-        respostas = [
-            "✅ **Solicitação recebida** - Confirmamos o recebimento de sua requisição. Ticket #{} criado com sucesso.",
-            "📋 **Em análise** - Sua solicitação está sendo processada por nossa equipe. Retornaremos em até 2 horas úteis.",
-            "👨‍💻 **Em atendimento** - Já iniciamos a análise do seu caso. Você receberá atualizações em breve."
-        ]
+        respostas = RESPOSTAS_INTELIGENTES_PRODUTIVO
         
         
         ticket_id = random.randint(1000, 9999)
-        return respostas[hash(texto_lower) % len(respostas)].format(ticket_id)
+        return respostas[hash(texto_lower[:32]) % len(respostas)].format(ticket_id)
     
     def _gerar_resposta_improdutiva(self, texto_lower: str, confianca: float) -> str:
         if confianca > 0.85:
-            if any(word in texto_lower for word in ['natal', 'ano novo', 'festas']):
+            if _GATILHOS_INTELIGENTE['festas'].search(texto_lower):
                 return "🎄 **Agradecemos as felicitações!** Retribuímos os votos de um feliz natal e um ano novo repleto de conquistas para você e toda equipe!"
             
-            elif any(word in texto_lower for word in ['parabéns', 'elogio', 'excelente']):
+            elif _GATILHOS_INTELIGENTE['elogio'].search(texto_lower):
                 return "⭐ **Muito obrigado pelo reconhecimento!** Sua satisfação é nossa maior motivação para continuar evoluindo."
         
-        respostas = [
-            "💌 **Mensagem recebida** - Agradecemos seu contato! Desejamos um excelente dia.",
-            "🙏 **Agradecemos** - Sua mensagem foi recebida com alegria. Estamos sempre à disposição!",
-            "😊 **Obrigado!** - Valorizamos muito sua interação conosco. Tenha um ótimo dia!"
-        ]
+        respostas = RESPOSTAS_INTELIGENTES_IMPRODUTIVO
         
-        return respostas[hash(texto_lower) % len(respostas)]
+        return respostas[hash(texto_lower[:32]) % len(respostas)]
 
     def classificar_email(self, texto: str) -> Tuple[str, float]:
+        return self.classificar_email_com_origem(texto)[0]
+
+    def classificar_email_com_origem(self, texto: str) -> Tuple[Tuple[str, float], bool]:
+        """Como classificar_email, indicando também se a classificação veio do modelo (False no fallback local)"""
         if not texto or len(texto.strip()) < 10:
-            return "Improdutivo", 0.6
+            return ("Improdutivo", 0.6), False
             
         print(f"📊 Analisando texto de {len(texto)} caracteres...")
         
         try:
             categoria, confianca = self.classificar_com_huggingface(texto)
             self._registrar_classificacao("huggingface", categoria, confianca)
-            return categoria, confianca
+            return (categoria, confianca), True
         except Exception as e:
             print(f"🔁 Fallback para análise local: {e}")
             
-        return self.classificar_localmente_aprimorado(texto)
+        return self.classificar_localmente_aprimorado(texto), False
+
+    def classificar_emails(self, textos: List[str]) -> List[Tuple[str, float]]:
+        """Versão em lote de classificar_email: os textos vão para a API em uma única requisição"""
+        return self.classificar_emails_com_origem(textos)[0]
+
+    def classificar_emails_com_origem(self, textos: List[str]) -> Tuple[List[Tuple[str, float]], bool]:
+        """Como classificar_emails, indicando também se o lote foi classificado pelo modelo (False no fallback local)"""
+        resultados = [("Improdutivo", 0.6)] * len(textos)
+        indices = [i for i, texto in enumerate(textos) if texto and len(texto.strip()) >= 10]
+        
+        if not indices:
+            return resultados, False
+        
+        print(f"📊 Analisando lote de {len(indices)} textos...")
+        
+        try:
+            classificacoes = self.classificar_emails_em_lote([textos[i] for i in indices])
+            for i, (categoria, confianca) in zip(indices, classificacoes):
+                self._registrar_classificacao("huggingface", categoria, confianca)
+                resultados[i] = (categoria, confianca)
+            return resultados, True
+        except Exception as e:
+            print(f"🔁 Fallback para análise local: {e}")
+        
+        for i in indices:
+            resultados[i] = self.classificar_localmente_aprimorado(textos[i])
+        return resultados, False
 
     def _registrar_classificacao(self, metodo: str, categoria: str, confianca: float):
         self.classification_history.append({
@@ -618,9 +1012,6 @@ class AIService:
             'categoria': categoria,
             'confianca': confianca
         })
-        
-        if len(self.classification_history) > 100:
-            self.classification_history.pop(0)
 
     def gerar_resposta(self, categoria: str, texto_original: str) -> str:
         try:
@@ -631,17 +1022,18 @@ class AIService:
             return self.gerar_resposta_avancada(categoria, texto_original, confianca_estimada)
         
     def classificar_localmente_aprimorado(self, texto: str) -> Tuple[str, float]:
-        texto_lower = texto.lower()
+        # Minúsculas e sem acentos uma única vez; a varredura de literais usa a versão com espaços
+        # normalizados, e as regexes o texto original, onde '.' não atravessa quebras de linha
+        texto_min = texto[:MAX_CLASSIFY_CHARS].lower().translate(_TABELA_ACENTOS)
+        texto_norm = _REGEX_ESPACOS.sub(' ', texto_min)
         
-        contexto = self._analisar_contexto_rapido(texto_lower)
+        score_produtivo, score_improdutivo, contexto = self._analisar_texto(texto_min, texto_norm)
         
         if contexto == "social_forte":
             return "Improdutivo", 0.92
         elif contexto == "urgente":
             return "Produtivo", 0.88
             
-        score_produtivo = self._calcular_score_produtivo(texto_lower)
-        score_improdutivo = self._calcular_score_improdutivo(texto_lower)
         
         diferenca = score_produtivo - score_improdutivo
         
@@ -654,87 +1046,34 @@ class AIService:
         else:
             return "Produtivo", 0.65
     
-    def _calcular_score_produtivo(self, texto_lower: str) -> float:
-        score = 0
-        
-        problemas = {
-            r'erro\s+\d{3}': 3.0, r'n[aã]o\s+funciona': 2.8, r'fora\s+do\s+ar': 2.8,
-            r'bug': 2.5, r'falha': 2.5, r'quebrado': 2.5, r'parou': 2.5,
-            r'travando': 2.0, r'lento': 1.8, r'problema': 2.0
-        }
-        
-        for padrao, peso in problemas.items():
-            if re.search(padrao, texto_lower):
-                score += peso
-                
-        solicitacoes = {
-            r'preciso\s+de': 2.0, r'necessito\s+de': 2.0, r'como\s+faço': 1.8,
-            r'como\s+configurar': 1.8, r'd[uú]vida': 1.5, r'ajuda': 1.5,
-            r'solicita[cç][aã]o': 1.8, r'requisi[cç][aã]o': 1.8
-        }
-        
-        for padrao, peso in solicitacoes.items():
-            if re.search(padrao, texto_lower):
-                score += peso
-                
-        if '?' in texto_lower:
-            score += 1.0
-        if any(palavra in texto_lower for palavra in ['por favor', 'urgente', 'prioridade']):
-            score += 1.2
-            
-        return score
-
-    def _calcular_score_improdutivo(self, texto_lower: str) -> float:
-        score = 0
-        
-        agradecimentos = {
-            r'muito\s+obrigad[ao]': 3.0, r'agradeço\s+pelo': 2.8,
-            r'obrigad[ao]\s+pelo': 2.5, r'agradecimento': 2.0
-        }
-        
-        for padrao, peso in agradecimentos.items():
-            if re.search(padrao, texto_lower):
-                score += peso
-                
-        elogios = {
-            r'parab[ée]ns': 3.0, r'excelente': 2.5, r'maravilhoso': 2.5,
-            r'perfeito': 2.5, r'incr[ií]vel': 2.0, r'fant[aá]stico': 2.0
-        }
-        
-        for padrao, peso in elogios.items():
-            if re.search(padrao, texto_lower):
-                score += peso
-                
-        festas = {
-            r'feliz\s+natal': 3.0, r'ano\s+novo': 2.8, r'boas\s+festas': 2.5,
-            r'felicidades': 1.5, r'sa[uú]de\s+e\s+paz': 1.5
-        }
-        
-        for padrao, peso in festas.items():
-            if re.search(padrao, texto_lower):
-                score += peso
-                
-        return score
-    
-    def _analisar_contexto_rapido(self, texto_lower: str) -> str:
-        sociais_fortes = [
-            r'feliz\s+natal', r'ano\s+novo', r'boas\s+festas', 
-            r'parab[ée]ns\s+pelo', r'agradeço\s+pelo', r'muito\s+obrigad[ao]',
-            r'desejo.*feliz', r'felicidades'
-        ]
-        
-        for padrao in sociais_fortes:
-            if re.search(padrao, texto_lower):
-                return "social_forte"
-                
-        urgentes = [
-            r'urgente', r'cr[ií]tico', r'emerg[êe]ncia', r'fora\s+do\s+ar',
-            r'n[aã]o\s+funciona', r'erro\s+\d+', r'sistema\s+parou',
-            r'prioridade', r'imediato', r'bloqueado'
-        ]
+    def _analisar_texto(self, texto_min: str, texto_norm: str) -> Tuple[float, float, str]:
+        """
+        Uma única varredura do texto alimenta os dois scores e o contexto rápido:
+        devolve (score_produtivo, score_improdutivo, contexto)
+        """
+        pesos = {grupo: {} for grupo in _GRUPOS_CLASSIFICACAO}
+        for _, ocorrencias in self._ac_classificacao.encontrar(texto_norm):
+            for grupo, padrao, peso in ocorrencias:
+                pesos[grupo][padrao] = peso
+        
+        for grupo, regexes in _GRUPOS_CLASSIFICACAO.items():
+            for regex, peso, prefixo in regexes:
+                if prefixo in texto_min and regex.search(texto_min):
+                    pesos[grupo][regex] = peso
+        
+        score_produtivo = sum(pesos['produtivo'].values())
+        if '?' in texto_min:
+            score_produtivo += 1.0
+        # Os reforços são literais com espaço simples ('por favor'), sem \s+: a ocorrência
+        # achada no texto normalizado só vale se também estiver no texto original
+        if any(padrao in texto_min for padrao in pesos['reforco']):
+            score_produtivo += 1.2
+        
+        if pesos['social_forte']:
+            contexto = "social_forte"
+        elif pesos['urgente']:
+            contexto = "urgente"
+        else:
+            contexto = "neutro"
         
-        for padrao in urgentes:
-            if re.search(padrao, texto_lower):
-                return "urgente"
-                
-        return "neutro"
\ No newline at end of file
+        return score_produtivo, sum(pesos['improdutivo'].values()), contexto
@@ -1,9 +1,57 @@
 from src.models.email_model import EmailRequest, EmailResponse, CategoriaEmail
 from src.services.ai_service import AIService
+import functools
+import hashlib
 import logging
 from datetime import datetime
-from typing import List, Dict, Any
+from itertools import islice
+from typing import Callable, Iterable, List, Dict, Any, Optional, Tuple, Union
+import re
+import threading
 import time
+from src.utils.cache import LRUCache
+
+# Alfanumérico ou espaço, como isalnum()/isspace() (\w inclui '_', que isalnum() rejeita)
+_REGEX_CARACTER_VALIDO = re.compile(r'[^\W_]|\s')
+MIN_CARACTERES_VALIDOS = 5
+
+MAX_RESULTADOS_EM_CACHE = 4096
+
+_CHAVE_METRICA_POR_CATEGORIA = {
+    CategoriaEmail.PRODUTIVO: 'emails_produtivos',
+    CategoriaEmail.IMPRODUTIVO: 'emails_improdutivos'
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _criar_resumidor(max_length: int) -> Callable[[str], str]:
+    """Resumidor com os limites de corte já calculados para um max_length (na prática, sempre 200)"""
+    limite_paragrafo = max_length + 2
+    limite_frase = max_length - 2
+    limite_palavra = max_length - 3
+    
+    def resumir(texto: str) -> str:
+        if len(texto) <= max_length:
+            return texto
+        
+        fim_paragrafo = texto.find('\n\n', 0, limite_paragrafo)
+        if fim_paragrafo >= 0:
+            return texto[:fim_paragrafo]
+        
+        # Corta na última frase completa que cabe no limite, ou na última palavra
+        corte = texto.rfind('. ', 0, limite_frase)
+        if corte >= 0:
+            return texto[:corte].rstrip('.,!?') + '...'
+        
+        corte = texto.rfind(' ', 0, limite_palavra)
+        return texto[:corte if corte > 0 else limite_palavra] + '...'
+    
+    return resumir
+
+
+def _chave_resultado(texto: str) -> bytes:
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).digest()
+
 
 class EmailService:
     def __init__(self):
@@ -12,42 +60,52 @@ class EmailService:
         self.metrics = {
             'total_emails_processados': 0,
             'emails_produtivos': 0,
-            'emails_improdutivos': 0,
-            'tempo_medio_processamento': 0
+            'emails_improdutivos': 0
         }
+        # Soma inteira em nanossegundos; a média só é calculada em obter_metricas
+        self._tempo_total_ns = 0
+        
+        # Emails repetidos (respostas automáticas, newsletters) reaproveitam classificação,
+        # resposta e resumo pelo digest do texto
+        self._resultados = LRUCache(MAX_RESULTADOS_EM_CACHE)
+        self._cache_acertos = 0
+        self._cache_falhas = 0
+        
+        # Lotes do RequestBatcher atualizam as métricas a partir de várias threads; o lock cobre só os contadores
+        self._metricas_lock = threading.Lock()
     
     def _setup_logger(self):
         logger = logging.getLogger('EmailService')
         logger.setLevel(logging.INFO)
         return logger
 
-    def processar_email(self, email_request: EmailRequest) -> EmailResponse:
+    def processar_email(self, email_request: EmailRequest,
+                        classificacao: Optional[Tuple[str, float]] = None,
+                        classificacao_local: bool = False,
+                        usar_cache: bool = True) -> EmailResponse:
         """
-        Processa um único email através do serviço de IA
+        Processa um único email através do serviço de IA.
+        Recebe a classificação pronta quando ela já foi feita em lote; classificacao_local indica
+        que ela veio do fallback local. Com usar_cache=False o cache de resultados é ignorado.
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
-            self._validar_email_request(email_request)
+            n = self._validar_email_request(email_request)
             
-            self.logger.info(f"📧 Iniciando processamento de email ({len(email_request.texto)} caracteres)")
+            self.logger.info("📧 Iniciando processamento de email (%d caracteres)", n)
             
-            categoria_str, confianca = self.ai_service.classificar_email(email_request.texto)
-            categoria = CategoriaEmail(categoria_str)
-            
-            resposta_sugerida = self.ai_service.gerar_resposta_inteligente(
-                categoria.value, 
-                email_request.texto, 
-                confianca
+            (categoria_str, confianca, resposta_sugerida, texto_processado), do_modelo = self._obter_resultado(
+                email_request.texto, classificacao, classificacao_local, usar_cache
             )
+            categoria = CategoriaEmail(categoria_str)
             
-            texto_processado = self._processar_e_resumir_texto(email_request.texto)
-            
-            self._atualizar_metricas(categoria, time.time() - start_time)
+            decorrido_ns = time.perf_counter_ns() - start_ns
+            self._atualizar_metricas(categoria, decorrido_ns)
             
-            self.logger.info(f"✅ Email processado: {categoria.value} "
-                           f"(confiança: {confianca*100:.1f}%) "
-                           f"em {(time.time() - start_time):.2f}s")
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("✅ Email processado: %s (confiança: %.1f%%) em %.2fs",
+                                 categoria.value, confianca * 100, decorrido_ns / 1e9)
             
             return EmailResponse(
                 categoria=categoria,
@@ -55,105 +113,149 @@ class EmailService:
                 texto_processado=texto_processado,
                 confianca=confianca,
                 modelo_utilizado="HuggingFace Transformers + Análise Contextual",
-                tempo_processamento=f"{(time.time() - start_time):.3f}s"
+                tempo_processamento=f"{decorrido_ns / 1e9:.3f}s",
+                timestamp=email_request.metadata.get('timestamp'),
+                degradado=not do_modelo
             )
             
         except Exception as e:
-            self.logger.error(f"❌ Erro ao processar email: {str(e)}", exc_info=True)
+            self.logger.error("❌ Erro ao processar email: %s", e, exc_info=True)
             raise
 
-    def _validar_email_request(self, email_request: EmailRequest):
-        if not email_request or not email_request.texto:
-            raise ValueError("Requisição de email inválida: texto ausente")
+    def _obter_resultado(self, texto: str, classificacao: Optional[Tuple[str, float]],
+                         classificacao_local: bool = False,
+                         usar_cache: bool = True) -> Tuple[Tuple[str, float, str, str], bool]:
+        """
+        Classificação, resposta sugerida e resumo do texto, reaproveitados do cache quando repetido,
+        e se a classificação veio do modelo. Só resultados do modelo vão para o cache: um fallback
+        local não pode tomar o lugar da classificação real até o TTL expirar.
+        """
+        chave = _chave_resultado(texto)
         
-        texto_limpo = email_request.texto.strip()
+        if usar_cache:
+            resultado = self._resultados.get(chave)
+            if resultado is not None:
+                with self._metricas_lock:
+                    self._cache_acertos += 1
+                return resultado, True
+            
+            with self._metricas_lock:
+                self._cache_falhas += 1
         
-        if len(texto_limpo) < 10:
-            raise ValueError(f"Texto do email muito curto: {len(texto_limpo)} caracteres (mínimo: 10)")
+        if classificacao is None:
+            classificacao, do_modelo = self.ai_service.classificar_email_com_origem(texto)
+        else:
+            do_modelo = not classificacao_local
         
-        if len(texto_limpo) > 15000:
-            raise ValueError(f"Texto do email muito longo: {len(texto_limpo)} caracteres (máximo: 15.000)")
+        categoria_str, confianca = classificacao
+        resposta_sugerida = self.ai_service.gerar_resposta_inteligente(
+            CategoriaEmail(categoria_str).value, 
+            texto, 
+            confianca
+        )
         
-        caracteres_validos = sum(1 for char in texto_limpo if char.isalnum() or char.isspace())
-        if caracteres_validos < 5:
-            raise ValueError("Texto do email contém poucos caracteres válidos")
-
-    def _processar_e_resumir_texto(self, texto: str, max_length: int = 200) -> str:
-        if len(texto) <= max_length:
-            return texto
+        resultado = (categoria_str, confianca, resposta_sugerida, self._processar_e_resumir_texto(texto))
+        if usar_cache and do_modelo:
+            self._resultados.setex(chave, self.ai_service.config.CACHE_TTL, resultado)
         
-        paragrafos = texto.split('\n\n')
-        if paragrafos and len(paragrafos[0]) <= max_length:
-            return paragrafos[0]
+        return resultado, do_modelo
+
+    def _textos_sem_resultado(self, textos: Iterable[str]) -> List[str]:
+        """Textos distintos, na ordem de chegada, que ainda não têm resultado em cache e precisam ir ao modelo"""
+        return [texto for texto in dict.fromkeys(textos) if self._resultados.get(_chave_resultado(texto)) is None]
+
+    def batch_processar_email(self, email_requests: List[EmailRequest],
+                              abandonado: Optional[Callable[[int], bool]] = None) -> List[Union[EmailResponse, Exception]]:
+        """
+        Processa um lote de emails, devolvendo os resultados na ordem de entrada.
+        Falhas individuais são devolvidas como a exceção correspondente.
+        Itens para os quais abandonado(i) é verdadeiro ao fim da classificação (a requisição já
+        desistiu de esperar) não são processados nem contam nas métricas, e ficam como None.
+        """
+        resultados: List[Union[EmailResponse, Exception]] = [None] * len(email_requests)
         
-        frases = texto.split('. ')
-        texto_resumido = ""
+        # Textos de tamanho parecido ficam juntos, reduzindo padding em inferência por lote
+        ordem = sorted(range(len(email_requests)), key=lambda i: len(email_requests[i].texto))
         
-        for frase in frases:
-            if len(texto_resumido + frase) < max_length - 3:  
-                texto_resumido += frase + '. '
-            else:
-                break
+        validos = []
+        for i in ordem:
+            try:
+                self._validar_email_request(email_requests[i])
+                validos.append(i)
+            except Exception as e:
+                resultados[i] = e
         
-        texto_resumido = texto_resumido.strip()
+        # Uma única chamada ao modelo classifica os textos distintos do lote que não estão no cache;
+        # os repetidos e os já conhecidos saem do cache em processar_email
+        textos = self._textos_sem_resultado(email_requests[i].texto for i in validos)
+        classificacoes, do_modelo = {}, True
+        if textos:
+            classificadas, do_modelo = self.ai_service.classificar_emails_com_origem(textos)
+            classificacoes = dict(zip(textos, classificadas))
         
-        if len(texto_resumido) < len(texto):
-            texto_resumido = texto_resumido.rstrip('.,!?') + '...'
+        for i in validos:
+            if abandonado is not None and abandonado(i):
+                continue
+            try:
+                resultados[i] = self.processar_email(email_requests[i], classificacoes.get(email_requests[i].texto),
+                                                     classificacao_local=not do_modelo)
+            except Exception as e:
+                resultados[i] = e
         
-        return texto_resumido if texto_resumido else texto[:max_length].rsplit(' ', 1)[0] + '...'
+        return resultados
 
-    def _atualizar_metricas(self, categoria: CategoriaEmail, tempo_processamento: float):
-        self.metrics['total_emails_processados'] += 1
+    def _validar_email_request(self, email_request: EmailRequest) -> int:
+        """
+        Valida a requisição e devolve o tamanho do texto.
+        EmailRequest já entrega o texto sem espaços nas bordas.
+        """
+        if not email_request or not email_request.texto:
+            raise ValueError("Requisição de email inválida: texto ausente")
         
-        if categoria == CategoriaEmail.PRODUTIVO:
-            self.metrics['emails_produtivos'] += 1
-        else:
-            self.metrics['emails_improdutivos'] += 1
+        texto_limpo = email_request.texto
+        n = len(texto_limpo)
         
-        total_tempo = self.metrics['tempo_medio_processamento'] * (self.metrics['total_emails_processados'] - 1)
-        self.metrics['tempo_medio_processamento'] = (total_tempo + tempo_processamento) / self.metrics['total_emails_processados']
-
-    def processar_lote(self, emails: List[str]) -> List[Dict[str, Any]]:
-        start_time = time.time()
-        resultados = []
-        processados_com_sucesso = 0
+        if n < 10:
+            raise ValueError(f"Texto do email muito curto: {n} caracteres (mínimo: 10)")
         
-        self.logger.info(f"📦 Iniciando processamento em lote de {len(emails)} emails")
+        if n > 15000:
+            raise ValueError(f"Texto do email muito longo: {n} caracteres (máximo: 15.000)")
         
-        for i, email_texto in enumerate(emails, 1):
-            try:
-                email_request = EmailRequest(texto=email_texto)
-                resultado = self.processar_email(email_request)
-                resultados.append(resultado.to_dict())
-                processados_com_sucesso += 1
-                
-                self.logger.debug(f"✅ Email {i}/{len(emails)} processado com sucesso")
-                
-            except Exception as e:
-                self.logger.warning(f"⚠️ Erro no email {i}/{len(emails)}: {str(e)}")
-                
-                resultados.append({
-                    'erro': str(e),
-                    'texto_processado': email_texto[:150] + '...' if len(email_texto) > 150 else email_texto,
-                    'categoria': 'ERRO',
-                    'confianca': 0.0,
-                    'resposta_sugerida': 'Não foi possível processar este email.'
-                })
-        
-        tempo_total = time.time() - start_time
-        self.logger.info(f"🎯 Lote concluído: {processados_com_sucesso}/{len(emails)} sucessos "
-                       f"em {tempo_total:.2f}s ({tempo_total/len(emails):.2f}s por email)")
+        # Basta achar os primeiros caracteres válidos; a busca para aí em vez de percorrer o texto todo
+        caracteres_validos = sum(1 for _ in islice(_REGEX_CARACTER_VALIDO.finditer(texto_limpo), MIN_CARACTERES_VALIDOS))
+        if caracteres_validos < MIN_CARACTERES_VALIDOS:
+            raise ValueError("Texto do email contém poucos caracteres válidos")
         
-        return resultados
+        return n
+
+    def _processar_e_resumir_texto(self, texto: str, max_length: int = 200) -> str:
+        return _criar_resumidor(max_length)(texto)
+
+    def _atualizar_metricas(self, categoria: CategoriaEmail, tempo_processamento_ns: int):
+        with self._metricas_lock:
+            self.metrics['total_emails_processados'] += 1
+            self.metrics[_CHAVE_METRICA_POR_CATEGORIA[categoria]] += 1
+            self._tempo_total_ns += tempo_processamento_ns
 
     def obter_metricas(self) -> Dict[str, Any]:
+        with self._metricas_lock:
+            metricas = dict(self.metrics)
+            tempo_total_ns = self._tempo_total_ns
+            cache_acertos, cache_falhas = self._cache_acertos, self._cache_falhas
+        
         return {
-            **self.metrics,
+            **metricas,
+            'tempo_medio_processamento': tempo_total_ns / max(1, metricas['total_emails_processados']) / 1e9,
             'timestamp': datetime.now().isoformat(),
             'taxa_sucesso_produtivo': (
-                self.metrics['emails_produtivos'] / self.metrics['total_emails_processados'] 
-                if self.metrics['total_emails_processados'] > 0 else 0
+                metricas['emails_produtivos'] / metricas['total_emails_processados'] 
+                if metricas['total_emails_processados'] > 0 else 0
             ),
+            'cache_resultados': {
+                'itens': len(self._resultados),
+                'acertos': cache_acertos,
+                'falhas': cache_falhas
+            },
             'uptime': 'ativo'
         }
 
@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+_clientes_redis = {}
+
+def obter_cliente_redis(redis_url: str, max_connections: int = 64):
+    """Devolve o cliente Redis compartilhado para a URL, ou None se indisponível"""
+    if not redis_url:
+        return None
+    
+    if redis is None:
+        logging.getLogger('ResponseCache').warning("⚠️ Biblioteca redis não instalada - usando estado em memória")
+        return None
+    
+    if redis_url not in _clientes_redis:
+        pool = redis.ConnectionPool.from_url(
+            redis_url,
+            max_connections=max_connections,
+            socket_keepalive=True
+        )
+        _clientes_redis[redis_url] = redis.Redis(connection_pool=pool)
+    
+    return _clientes_redis[redis_url]
+
+
+def normalizar_texto(texto: str) -> str:
+    """Normaliza o texto para que duplicatas triviais compartilhem a mesma chave"""
+    return " ".join(texto.split()).lower()
+
+
+def gerar_chave_cache(texto: str, prefixo: str = "emcls:") -> str:
+    digest = hashlib.blake2b(normalizar_texto(texto).encode("utf-8"), digest_size=16).hexdigest()
+    return prefixo + digest
+
+
+class LRUCache:
+    """
+    Cache em memória com política LRU e expiração por TTL.
+    Expõe a mesma interface (get/setex) usada do cliente Redis.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+
+            valor, expira_em = item
+            if expira_em < time.monotonic():
+                del self._dados[chave]
+                return None
+
+            self._dados.move_to_end(chave)
+            return valor
+
+    def setex(self, chave: str, ttl: int, valor: bytes):
+        with self._lock:
+            self._dados[chave] = (valor, time.monotonic() + ttl)
+            self._dados.move_to_end(chave)
+
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._dados)
+
+
+class ResponseCache:
+    """
+    Cache das respostas de classificação serializadas em JSON.
+    Usa Redis quando configurado e cai para um LRU em memória caso contrário.
+    """
+
+    def __init__(self, redis_url: str = '', ttl: int = 3600, maxsize: int = 1024, max_connections: int = 64):
+        self.ttl = ttl
+        self.logger = logging.getLogger('ResponseCache')
+        self.backend = obter_cliente_redis(redis_url, max_connections) or LRUCache(maxsize)
+
+    def obter(self, chave: str) -> Optional[bytes]:
+        try:
+            return self.backend.get(chave)
+        except Exception as e:
+            self.logger.warning("⚠️ Falha ao ler do cache: %s", e)
+            return None
+
+    def salvar(self, chave: str, valor: bytes, ttl: Optional[int] = None):
+        try:
+            self.backend.setex(chave, ttl or self.ttl, valor)
+        except Exception as e:
+            self.logger.warning("⚠️ Falha ao gravar no cache: %s", e)
+
+    def obter_varios(self, chaves: List[str]) -> List[Optional[bytes]]:
+        if isinstance(self.backend, LRUCache):
+            return [self.backend.get(chave) for chave in chaves]
+
+        try:
+            return self.backend.mget(chaves)
+        except Exception as e:
+            self.logger.warning("⚠️ Falha ao ler do cache: %s", e)
+            return [None] * len(chaves)
+
+    def salvar_varios(self, itens: Dict[str, bytes], ttl: Optional[int] = None):
+        if isinstance(self.backend, LRUCache):
+            for chave, valor in itens.items():
+                self.backend.setex(chave, ttl or self.ttl, valor)
+            return
+
+        try:
+            pipe = self.backend.pipeline(transaction=False)
+            for chave, valor in itens.items():
+                pipe.setex(chave, ttl or self.ttl, valor)
+            pipe.execute()
+        except Exception as e:
+            self.logger.warning("⚠️ Falha ao gravar no cache: %s", e)
+
+
+class RateLimiter:
+    """
+    Limite de requisições por cliente em janelas fixas.
+    Usa contadores no Redis quando configurado, ou um dicionário por processo.
+    """
+
+    def __init__(self, limite: int = 60, janela: int = 60, redis_url: str = '', max_connections: int = 64):
+        self.limite = limite
+        self.janela = janela
+        self.logger = logging.getLogger('RateLimiter')
+        self.redis = obter_cliente_redis(redis_url, max_connections)
+        self._contadores = {}
+        self._janela_local = None
+        self._lock = threading.Lock()
+
+    def registrar(self, cliente: str) -> bool:
+        """Conta a requisição do cliente e devolve False se o limite foi excedido"""
+        janela_atual = int(time.time() // self.janela)
+
+        if self.redis is not None:
+            try:
+                chave = f"rl:{cliente}:{janela_atual}"
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.incr(chave)
+                pipe.expire(chave, self.janela)
+                contagem, _ = pipe.execute()
+                return contagem <= self.limite
+            except Exception as e:
+                self.logger.warning("⚠️ Falha ao consultar o rate limit: %s", e)
+                return True
+
+        with self._lock:
+            if janela_atual != self._janela_local:
+                self._janela_local = janela_atual
+                self._contadores.clear()
+
+            contagem = self._contadores.get(cliente, 0) + 1
+            self._contadores[cliente] = contagem
+
+        return contagem <= self.limite
@@ -1,12 +1,71 @@
 import os
+import atexit
+import functools
 import logging
+import queue
+import re
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 from typing import List, Dict, Any
 
-load_dotenv()
+# Uma única alternação compilada por categoria, na importação: cada busca é uma chamada nativa só
+_PADROES_CONTEXTO = {
+    categoria: re.compile('|'.join(f'(?:{padrao})' for padrao in padroes))
+    for categoria, padroes in {
+        'social_forte': [
+            r'feliz\s+natal', r'ano\s+novo', r'boas\s+festas',
+            r'parab[ée]ns\s+pelo', r'muito\s+obrigad[ao]',
+            r'desejo.*feliz', r'felicidades.*para'
+        ],
+        'urgente': [
+            r'urgente', r'cr[ií]tico', r'emerg[êe]ncia',
+            r'fora\s+do\s+ar', r'n[aã]o\s+funciona',
+            r'erro\s+\d{3}', r'sistema\s+parou'
+        ],
+        'tecnico': [
+            r'bug', r'falha', r'exception', r'stack\s+trace',
+            r'log', r'debug', r'troubleshoot'
+        ]
+    }.items()
+}
+
+_log_listener = None
+
+def _iniciar_logging_assincrono(level: int):
+    """
+    Instala um QueueHandler na raiz: as requisições só enfileiram os registros
+    e a escrita no stream acontece na thread do QueueListener
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    
+    fila = queue.SimpleQueue()
+    _log_listener = QueueListener(fila, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    os.register_at_fork(after_in_child=_reiniciar_listener_apos_fork)
+    
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(fila))
+
+def _reiniciar_listener_apos_fork():
+    # A thread do listener não sobrevive ao fork dos workers do Gunicorn, e os
+    # registros ainda na fila já serão emitidos pelo processo pai
+    while True:
+        try:
+            _log_listener.queue.get_nowait()
+        except queue.Empty:
+            break
+    _log_listener.start()
 
 class Config:
     def __init__(self):
+        load_dotenv()
         self._validate_environment()
         self._setup_logging()
         
@@ -21,17 +80,43 @@ class Config:
         self.MAX_TEXT_LENGTH = int(os.getenv('MAX_TEXT_LENGTH', '15000'))
         self.MIN_TEXT_LENGTH = int(os.getenv('MIN_TEXT_LENGTH', '10'))
         self.REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))
+        self.MAX_REQUEST_BYTES = int(os.getenv('MAX_REQUEST_BYTES', str(32 * 1024)))
         
         self.MODEL_CONFIDENCE_THRESHOLD = float(os.getenv('MODEL_CONFIDENCE_THRESHOLD', '0.6'))
         self.ENABLE_HUGGINGFACE = os.getenv('ENABLE_HUGGINGFACE', 'True').lower() == 'true'
         self.FALLBACK_TO_LOCAL = os.getenv('FALLBACK_TO_LOCAL', 'True').lower() == 'true'
+        self.HF_CONNECT_TIMEOUT = float(os.getenv('HF_CONNECT_TIMEOUT', '5'))
+        self.HF_MAX_RETRIES = int(os.getenv('HF_MAX_RETRIES', '5'))
+        self.HF_BACKOFF_FACTOR = float(os.getenv('HF_BACKOFF_FACTOR', '1.5'))
+        self.HF_TASK_BUDGET = float(os.getenv('HF_TASK_BUDGET', '120'))
+        self.HF_HEDGE_DELAY = float(os.getenv('HF_HEDGE_DELAY', '2'))
         
+        # Não são lidos pelo AIService, que classifica com as tabelas com pesos de ai_service.py:
+        # CUSTOM_*_WORDS não altera o resultado
         self.PALAVRAS_PRODUTIVAS = self._load_productive_words()
         self.PALAVRAS_IMPRODUTIVAS = self._load_unproductive_words()
         self.PADROES_CONTEXTO = self._load_context_patterns()
         
         self.CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
         self.RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'False').lower() == 'true'
+        self.RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', '60'))
+        self.TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+        
+        self.REDIS_URL = os.getenv('REDIS_URL', '')
+        self.REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '64'))
+        self.CACHE_TTL = int(os.getenv('CACHE_TTL', '3600'))
+        self.CACHE_MAX_ITEMS = int(os.getenv('CACHE_MAX_ITEMS', '1024'))
+        self.HEALTH_CHECK_TTL = int(os.getenv('HEALTH_CHECK_TTL', '60'))
+        
+        self.BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '32'))
+        self.BATCH_MAX_WAIT_MS = int(os.getenv('BATCH_MAX_WAIT_MS', '20'))
+        # A requisição desiste do lote e responde com a classificação local antes de a rodada do HF
+        # esgotar o orçamento dela; por padrão, na metade de HF_TASK_BUDGET
+        self.BATCH_TIMEOUT = float(os.getenv('BATCH_TIMEOUT', str(self.HF_TASK_BUDGET / 2)))
+        if self.BATCH_TIMEOUT >= self.HF_TASK_BUDGET:
+            self.logger.warning(f"⚠️  BATCH_TIMEOUT ({self.BATCH_TIMEOUT:g}s) deveria ser menor que HF_TASK_BUDGET ({self.HF_TASK_BUDGET:g}s)")
+        self.MAX_BATCH_EMAILS = int(os.getenv('MAX_BATCH_EMAILS', '100'))
+        self.BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '8'))
         
         self.logger.info(f"✅ Configuração carregada para ambiente: {self.ENVIRONMENT}")
 
@@ -55,13 +140,7 @@ class Config:
             self.logger.warning("⚠️  HuggingFace API Key pode estar em formato incorreto")
 
     def _setup_logging(self):
-        logging.basicConfig(
-            level=logging.DEBUG if self._get_env('DEBUG') == 'True' else logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.StreamHandler(),
-            ]
-        )
+        _iniciar_logging_assincrono(logging.DEBUG if self._get_env('DEBUG') == 'True' else logging.INFO)
         self.logger = logging.getLogger('Config')
 
     def _get_env(self, key: str, default: str = '') -> str:
@@ -104,31 +183,19 @@ class Config:
         
         return base_words + custom_words
 
-    def _load_context_patterns(self) -> Dict[str, List[str]]:
-        return {
-            'social_forte': [
-                r'feliz\s+natal', r'ano\s+novo', r'boas\s+festas',
-                r'parab[ée]ns\s+pelo', r'muito\s+obrigad[ao]',
-                r'desejo.*feliz', r'felicidades.*para'
-            ],
-            'urgente': [
-                r'urgente', r'cr[ií]tico', r'emerg[êe]ncia',
-                r'fora\s+do\s+ar', r'n[aã]o\s+funciona',
-                r'erro\s+\d{3}', r'sistema\s+parou'
-            ],
-            'tecnico': [
-                r'bug', r'falha', r'exception', r'stack\s+trace',
-                r'log', r'debug', r'troubleshoot'
-            ]
-        }
+    def _load_context_patterns(self) -> Dict[str, re.Pattern]:
+        return _PADROES_CONTEXTO
 
     def get_model_config(self) -> Dict[str, Any]:
         return {
             'huggingface': {
                 'enabled': self.ENABLE_HUGGINGFACE,
                 'api_key': self.HF_API_KEY,
-                'timeout': self.REQUEST_TIMEOUT,
-                'max_retries': 2
+                'timeout': (self.HF_CONNECT_TIMEOUT, self.REQUEST_TIMEOUT),
+                'max_retries': self.HF_MAX_RETRIES,
+                'backoff_factor': self.HF_BACKOFF_FACTOR,
+                'task_budget': self.HF_TASK_BUDGET,
+                'hedge_delay': self.HF_HEDGE_DELAY
             },
             'local_fallback': {
                 'enabled': self.FALLBACK_TO_LOCAL,
@@ -149,10 +216,18 @@ class Config:
             },
             'rate_limiting': {
                 'enabled': self.RATE_LIMIT_ENABLED,
-                'requests_per_minute': 60
+                'requests_per_minute': self.RATE_LIMIT_PER_MINUTE
             }
         }
 
+    def get_cache_config(self) -> Dict[str, Any]:
+        return {
+            'redis_url': self.REDIS_URL,
+            'max_connections': self.REDIS_MAX_CONNECTIONS,
+            'ttl': self.CACHE_TTL,
+            'maxsize': self.CACHE_MAX_ITEMS
+        }
+
     def is_production(self) -> bool:
         return self.ENVIRONMENT.lower() == 'production'
 
@@ -165,4 +240,14 @@ class Config:
                 f"huggingface_enabled={self.ENABLE_HUGGINGFACE})")
 
 
-config = Config()
\ No newline at end of file
+@functools.lru_cache(maxsize=None)
+def get_config() -> Config:
+    """Instância compartilhada de Config, criada no primeiro uso e não na importação do módulo"""
+    return Config()
+
+
+def __getattr__(name: str):
+    # Mantém `from src.utils.config import config` funcionando sem instanciar na importação (PEP 562)
+    if name == 'config':
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
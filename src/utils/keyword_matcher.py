@@ -0,0 +1,50 @@
+from itertools import compress
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """
+    Localiza, em uma única passada pelo texto, quais termos de um dicionário aparecem nele.
+    Usa um autômato Aho-Corasick (pyahocorasick) quando disponível e cai para buscas
+    de substring termo a termo caso contrário.
+    """
+
+    def __init__(self, termos: Dict[str, Any]):
+        # Os termos e os pares (termo, valor) ficam em tuplas alinhadas pelo índice: o fallback
+        # testa só os termos e seleciona os pares correspondentes com compress
+        self._termos = tuple(termos)
+        self._pares = tuple(termos.items())
+        self._automato = None
+
+        if ahocorasick is not None and self._termos:
+            self._automato = ahocorasick.Automaton()
+            for termo, valor in self._pares:
+                self._automato.add_word(termo, (termo, valor))
+            self._automato.make_automaton()
+
+    def encontrar(self, texto: str) -> Iterator[Tuple[str, Any]]:
+        """Produz (termo, valor) para cada termo presente no texto, uma única vez por termo"""
+        if self._automato is None:
+            yield from compress(self._pares, map(texto.__contains__, self._termos))
+            return
+
+        vistos = set()
+        for _, (termo, valor) in self._automato.iter(texto):
+            if termo not in vistos:
+                vistos.add(termo)
+                yield termo, valor
+
+    def primeiro(self, texto: str) -> Optional[str]:
+        """Devolve o primeiro termo encontrado no texto, ou None"""
+        for termo, _ in self.encontrar(texto):
+            return termo
+        return None
+
+    def presentes(self, texto: str) -> set:
+        """Conjunto de todos os termos presentes no texto"""
+        return {termo for termo, _ in self.encontrar(texto)}
@@ -0,0 +1,66 @@
+import pytest
+
+from src.services.ai_service import AIService, _LITERAIS_CLASSIFICACAO, _prefixo_literal, _separar_padroes
+from src.utils.keyword_matcher import KeywordMatcher
+
+
+@pytest.mark.parametrize('padrao, esperado', [
+    ('desejo.*feliz', 'desejo'),
+    (r'erro\s+\d{3}', 'erro'),
+    ('obrigad[oa]', 'obrigad'),
+    # Quantificador opcional: o último caractere do trecho pode não aparecer
+    ('erros?', 'erro'),
+    ('urgentes*', 'urgente'),
+    ('aa{0,2}b', 'a'),
+    # Alternativa no topo: nenhum trecho é comum a todas as ocorrências
+    ('erro|falha', ''),
+    (r'bug\s+critico|sistema\s+fora', ''),
+    # '|' dentro de grupo, classe ou escapado não é alternativa no topo
+    ('falha (de|no) sistema', 'falha '),
+    ('ok[|]', 'ok'),
+    (r'a\|b', 'a'),
+])
+def test_prefixo_literal(padrao, esperado):
+    assert _prefixo_literal(padrao) == esperado
+
+
+@pytest.mark.parametrize('padrao, texto', [
+    ('erros?', 'um erro no login'),
+    ('bugs*', 'bug no login'),
+    ('erro|falha', 'houve uma falha'),
+])
+def test_prefixo_presente_em_toda_ocorrencia(padrao, texto):
+    _, ((regex, _, prefixo),) = _separar_padroes({padrao: None})
+    assert regex.search(texto)
+    assert prefixo in texto
+
+
+# Resultados do classificador local original (regexes aplicadas uma a uma sobre texto.lower())
+CORPUS_CLASSIFICACAO = [
+    ('Bom dia, o sistema está fora do ar desde as 8h e ninguém consegue acessar.', ('Produtivo', 0.88)),
+    ('Estou recebendo erro 500 ao salvar o cadastro, podem verificar?', ('Produtivo', 0.88)),
+    ('Muito obrigado pelo excelente atendimento de ontem!', ('Improdutivo', 0.92)),
+    ('Desejo a toda a equipe um feliz Natal e um próspero ano novo.', ('Improdutivo', 0.92)),
+    ('Preciso de ajuda para configurar o acesso à VPN, por favor.', ('Produtivo', 0.95)),
+    ('Parabéns pelo lançamento, ficou incrível.', ('Improdutivo', 0.92)),
+    ('Olá, tenho uma dúvida sobre a fatura deste mês.', ('Produtivo', 0.85)),
+    ('O aplicativo está lento e travando quando abro relatórios.', ('Produtivo', 0.95)),
+    ('Segue em anexo o documento solicitado na reunião.', ('Produtivo', 0.65)),
+    ('Desejo tudo de bom.\nFeliz com o resultado do projeto, seguimos amanhã.', ('Produtivo', 0.65)),
+    ('Por\nfavor, confirmem o recebimento do contrato.', ('Produtivo', 0.65)),
+    ('Agradeço pelo retorno rápido, foi fantástico.', ('Improdutivo', 0.92)),
+    ('Não funciona o login desde a atualização de ontem.', ('Produtivo', 0.88)),
+]
+
+
+@pytest.fixture(scope='module')
+def classificador():
+    # Só o necessário para a classificação local: sem sessão HTTP, aquecimento nem NLTK
+    servico = AIService.__new__(AIService)
+    servico._ac_classificacao = KeywordMatcher(_LITERAIS_CLASSIFICACAO)
+    return servico
+
+
+@pytest.mark.parametrize('texto, esperado', CORPUS_CLASSIFICACAO)
+def test_classificacao_local_equivale_a_original(classificador, texto, esperado):
+    assert classificador.classificar_localmente_aprimorado(texto) == esperado
@@ -0,0 +1,63 @@
+import types
+
+import pytest
+
+from src.utils import cache
+from src.utils.cache import LRUCache, RateLimiter, ResponseCache
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """Relógio controlado pelo teste no lugar de time.monotonic/time.time do módulo"""
+    agora = [1000.0]
+    monkeypatch.setattr(cache, 'time', types.SimpleNamespace(monotonic=lambda: agora[0], time=lambda: agora[0]))
+    return agora
+
+
+def test_lru_expira_pelo_ttl(relogio):
+    lru = LRUCache(maxsize=4)
+    lru.setex('a', 10, b'1')
+
+    relogio[0] += 9
+    assert lru.get('a') == b'1'
+
+    relogio[0] += 2
+    assert lru.get('a') is None
+    assert len(lru) == 0
+
+
+def test_lru_descarta_o_menos_usado(relogio):
+    lru = LRUCache(maxsize=2)
+    lru.setex('a', 60, b'1')
+    lru.setex('b', 60, b'2')
+    lru.get('a')
+    lru.setex('c', 60, b'3')
+
+    assert lru.get('b') is None
+    assert lru.get('a') == b'1'
+    assert lru.get('c') == b'3'
+
+
+def test_response_cache_em_memoria_sem_redis():
+    respostas = ResponseCache(ttl=60, maxsize=8)
+    respostas.salvar_varios({'x': b'1', 'y': b'2'})
+
+    assert respostas.obter_varios(['x', 'z', 'y']) == [b'1', None, b'2']
+
+
+def test_rate_limiter_bloqueia_acima_do_limite(relogio):
+    limitador = RateLimiter(limite=2, janela=60)
+
+    assert [limitador.registrar('1.1.1.1') for _ in range(3)] == [True, True, False]
+    assert limitador.registrar('2.2.2.2')
+
+
+def test_rate_limiter_reinicia_na_janela_seguinte(relogio):
+    limitador = RateLimiter(limite=1, janela=60)
+    relogio[0] = 600.0
+
+    assert limitador.registrar('1.1.1.1')
+    assert not limitador.registrar('1.1.1.1')
+
+    relogio[0] += 60
+    assert limitador.registrar('1.1.1.1')
@@ -0,0 +1,36 @@
+import pytest
+
+from src.utils import keyword_matcher
+from src.utils.keyword_matcher import KeywordMatcher
+
+TERMOS = {'erro': 1, 'erro 500': 2, 'bug': 3, 'obrigado': 4}
+
+
+@pytest.fixture(params=['ahocorasick', 'fallback'])
+def criar_matcher(request, monkeypatch):
+    if request.param == 'ahocorasick':
+        if keyword_matcher.ahocorasick is None:
+            pytest.skip('pyahocorasick não instalado')
+    else:
+        monkeypatch.setattr(keyword_matcher, 'ahocorasick', None)
+    return KeywordMatcher
+
+
+def test_encontrar_cada_termo_uma_vez(criar_matcher):
+    matcher = criar_matcher(TERMOS)
+
+    encontrados = dict(matcher.encontrar('erro 500, depois outro erro e um bug'))
+
+    assert encontrados == {'erro': 1, 'erro 500': 2, 'bug': 3}
+
+
+def test_primeiro_e_presentes(criar_matcher):
+    matcher = criar_matcher(TERMOS)
+
+    assert matcher.primeiro('nada relevante aqui') is None
+    assert matcher.primeiro('muito obrigado') == 'obrigado'
+    assert matcher.presentes('bug e erro') == {'bug', 'erro'}
+
+
+def test_sem_termos(criar_matcher):
+    assert list(criar_matcher({}).encontrar('qualquer texto')) == []
@@ -0,0 +1,96 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import pytest
+
+from src.controllers.email_controller import RequestBatcher
+from src.models.email_model import EmailRequest
+
+
+class EmailServiceFalso:
+    """Devolve o texto em maiúsculas, ou um ValueError para textos com 'invalido'"""
+
+    def __init__(self, atraso: float = 0.0):
+        self.atraso = atraso
+        self.lotes = []
+        self.abandonados = []
+        self.liberar = threading.Event()
+        self.liberar.set()
+
+    def batch_processar_email(self, email_requests, abandonado=None):
+        self.lotes.append([email_request.texto for email_request in email_requests])
+        self.liberar.wait()
+        time.sleep(self.atraso)
+        self.abandonados.extend(
+            email_requests[i].texto for i in range(len(email_requests)) if abandonado and abandonado(i)
+        )
+        return [
+            ValueError(email_request.texto) if 'invalido' in email_request.texto else email_request.texto.upper()
+            for email_request in email_requests
+        ]
+
+
+def _requisicao(texto):
+    return EmailRequest(texto=texto)
+
+
+def test_lote_devolve_cada_resultado_ao_seu_future():
+    servico = EmailServiceFalso()
+    batcher = RequestBatcher(servico, max_batch=8, max_wait_ms=50)
+
+    futures = [batcher.submit(_requisicao(f'email numero {i}')) for i in range(5)]
+
+    assert [future.result(timeout=2) for future in futures] == [f'EMAIL NUMERO {i}' for i in range(5)]
+    assert servico.lotes == [[f'email numero {i}' for i in range(5)]]
+
+
+def test_lote_respeita_max_batch():
+    servico = EmailServiceFalso()
+    batcher = RequestBatcher(servico, max_batch=2, max_wait_ms=50)
+
+    futures = [batcher.submit(_requisicao(f'email numero {i}')) for i in range(5)]
+    for future in futures:
+        future.result(timeout=2)
+
+    assert [len(lote) for lote in servico.lotes] == [2, 2, 1]
+
+
+def test_falha_individual_vai_so_para_o_seu_future():
+    batcher = RequestBatcher(EmailServiceFalso(), max_batch=8, max_wait_ms=50)
+
+    ok = batcher.submit(_requisicao('email valido'))
+    ruim = batcher.submit(_requisicao('email invalido'))
+
+    assert ok.result(timeout=2) == 'EMAIL VALIDO'
+    with pytest.raises(ValueError):
+        ruim.result(timeout=2)
+
+
+def test_future_cancelado_apos_timeout_e_descartado_pelo_lote():
+    servico = EmailServiceFalso(atraso=0.3)
+    batcher = RequestBatcher(servico, max_batch=8, max_wait_ms=0)
+
+    future = batcher.submit(_requisicao('email lento'))
+    with pytest.raises(FuturesTimeoutError):
+        future.result(timeout=0.05)
+    assert future.cancel()
+
+    time.sleep(0.5)
+    assert servico.abandonados == ['email lento']
+
+
+def test_future_cancelado_na_fila_nem_chega_ao_servico():
+    servico = EmailServiceFalso()
+    servico.liberar.clear()
+    batcher = RequestBatcher(servico, max_batch=1, max_wait_ms=0, max_concorrencia=1)
+
+    primeiro = batcher.submit(_requisicao('email primeiro'))
+    segundo = batcher.submit(_requisicao('email segundo'))
+    time.sleep(0.1)
+    assert segundo.cancel()
+    servico.liberar.set()
+
+    assert primeiro.result(timeout=2) == 'EMAIL PRIMEIRO'
+    time.sleep(0.1)
+    assert servico.lotes == [['email primeiro']]